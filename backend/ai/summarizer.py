@@ -1,57 +1,102 @@
 import anthropic
-from typing import List
+import asyncio
+from typing import AsyncIterator, Callable, List
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timezone
+from ai.summary_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, SummaryCache, summary_cache_key
+from scraping.models import Message, embed_text_fields
 
 load_dotenv()
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
-def format_messages_for_summary(messages: List[dict]) -> str:
-    """Format Discord messages into a clean text format for Claude"""
-    formatted_messages = []
+# Seconds before a Claude request is abandoned (connect timeout is shorter)
+SUMMARY_TIMEOUT = float(os.getenv("SUMMARY_TIMEOUT", 120))
+# Claude requests in flight at once across all summaries; the rest queue
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 8))
+
+# One async client so connections to the API are pooled and reused
+client = anthropic.AsyncAnthropic(
+    api_key=os.getenv("ANTHROPIC_API_KEY"),
+    timeout=anthropic.Timeout(SUMMARY_TIMEOUT, connect=10.0),
+    max_retries=2,
+)
+_request_slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+MODEL = "claude-3-5-haiku-20241022"
+# Bump whenever the prompt changes so cached summaries are not reused
+PROMPT_VERSION = "2"
+SUMMARY_MAX_TOKENS = 2500
+CHUNK_MAX_TOKENS = 1500
+
+# Inputs larger than this are summarized chunk by chunk, then reduced
+CHUNK_TOKEN_BUDGET = int(os.getenv("SUMMARY_CHUNK_TOKENS", 30000))
+if CHUNK_TOKEN_BUDGET <= CHUNK_MAX_TOKENS:
+    # Each partial summary can fill a chunk on its own, so condensing would never converge
+    raise ValueError(f"SUMMARY_CHUNK_TOKENS must be larger than {CHUNK_MAX_TOKENS}")
+MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 4))
+
+SYSTEM_PROMPT = """You are an expert news editor that creates concise, journalistic summaries.
+            Write in clear AP style with strong leads.
+            Focus on specific facts and concrete details.
+            Lead with the most newsworthy information.
+            Include both primary developments and significant secondary events.
+            Keep writing tight and focused while maintaining context.
+            Use active voice and journalistic tone."""
+
+CHUNK_SYSTEM_PROMPT = """You are a news editor condensing raw news updates into accurate notes
+            for a final summary written later. Preserve every concrete fact."""
+
+summary_cache = SummaryCache(
+    max_entries=int(os.getenv("SUMMARY_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+    ttl=float(os.getenv("SUMMARY_CACHE_TTL", DEFAULT_TTL)),
+    path=os.getenv("SUMMARY_CACHE_PATH"),
+)
+
+def format_message_for_summary(msg: Message) -> str:
+    """Format one Discord message into clean text for Claude"""
+    # Extract timestamp
+    timestamp = msg.timestamp
     
-    for msg in messages:
-        # Extract timestamp
-        timestamp = msg.get('timestamp', '')
-        
-        # Extract content and embeds
-        content = msg.get('content', '')
-        embeds = msg.get('embeds', [])
-        
-        # Format embed information
-        embed_text = []
-        for embed in embeds:
-            if embed.get('title'):
-                embed_text.append(f"Title: {embed['title']}")
-            if embed.get('description'):
-                embed_text.append(f"Description: {embed['description']}")
-            for field in embed.get('fields', []):
-                if field['name'].lower() != 'source':
-                    embed_text.append(f"{field['name']}: {field['value']}")
-        
-        # Combine all information
-        message_text = f"[{timestamp}]\n"
-        if content:
-            message_text += f"{content}\n"
-        if embed_text:
-            message_text += "\n".join(embed_text) + "\n"
-        
-        formatted_messages.append(message_text)
+    # Extract content and embeds
+    content = msg.content
+    embeds = msg.embeds
     
-    return "\n---\n".join(formatted_messages)
-
-async def generate_summary(messages: List[dict]) -> str:
-    """Generate a summary of the messages using Claude"""
-    formatted_text = format_messages_for_summary(messages)
+    # Format embed information
+    embed_text = [f"{label}: {text}" for label, text in embed_text_fields(embeds)]
     
-    timestamps = [datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc) 
-                 for msg in messages]
-    oldest = min(timestamps)
-    newest = max(timestamps)
-    hours_diff = round((newest - oldest).total_seconds() / 3600, 1)
+    # Combine all information
+    message_text = f"[{timestamp}]\n"
+    if content:
+        message_text += f"{content}\n"
+    if embed_text:
+        message_text += "\n".join(embed_text) + "\n"
     
-    prompt = f"""You are a professional news editor specializing in concise, journalistic summaries. Below are news updates from the last {hours_diff} hours.
+    return message_text
+
+def format_messages_for_summary(messages: List[Message]) -> str:
+    """Format Discord messages into a clean text format for Claude"""
+    return "\n---\n".join(format_message_for_summary(msg) for msg in messages)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def chunk_texts(texts: List[str], token_budget: int = CHUNK_TOKEN_BUDGET) -> List[List[str]]:
+    """Split texts, in order, into consecutive chunks that fit the token budget"""
+    chunks = []
+    current, current_tokens = [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if current and current_tokens + tokens > token_budget:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def build_summary_prompt(hours_diff: float, updates_text: str) -> str:
+    return f"""You are a professional news editor specializing in concise, journalistic summaries. Below are news updates from the last {hours_diff} hours.
 
 Create a news summary following this structure:
 
@@ -75,30 +120,174 @@ Guidelines:
 - Include all relevant information
 
 News Updates to Summarize:
-{formatted_text}
+{updates_text}
 
 Summary:"""
 
-    try:
-        response = client.messages.create(
-            model="claude-3-5-haiku-20241022",
-            max_tokens=2500,
+def build_chunk_prompt(updates_text: str) -> str:
+    return f"""Below is one part of a longer series of news updates. Condense it into a chronological list of the key developments it reports.
+
+Guidelines:
+- Keep timestamps, locations, names, numbers and direct quotes
+- Merge updates that report the same event
+- Drop repetition and minor details
+- Do not add commentary or information that is not in the updates
+
+News Updates:
+{updates_text}
+
+Key developments:"""
+
+async def complete(prompt: str, system: str = SYSTEM_PROMPT, model: str = MODEL,
+                   max_tokens: int = SUMMARY_MAX_TOKENS) -> str:
+    """Run one Claude completion, waiting for a free request slot first"""
+    async with _request_slots:
+        response = await client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
             temperature=0,
-            system="""You are an expert news editor that creates concise, journalistic summaries.
-            Write in clear AP style with strong leads.
-            Focus on specific facts and concrete details.
-            Lead with the most newsworthy information.
-            Include both primary developments and significant secondary events.
-            Keep writing tight and focused while maintaining context.
-            Use active voice and journalistic tone.""",
+            system=system,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        )
+    return response.content[0].text
+
+async def close_summarizer():
+    """Close the pooled Claude connections (call on shutdown)"""
+    await client.close()
+
+async def stream_completion(prompt: str, system: str = SYSTEM_PROMPT, model: str = MODEL,
+                            max_tokens: int = SUMMARY_MAX_TOKENS) -> AsyncIterator[str]:
+    """Run one Claude completion, yielding text deltas as they arrive"""
+    async with _request_slots:
+        async with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=0,
+            system=system,
             messages=[
                 {
                     "role": "user",
                     "content": prompt
                 }
             ]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+async def condense_texts(
+    texts: List[str],
+    model: str = MODEL,
+    token_budget: int = CHUNK_TOKEN_BUDGET,
+) -> str:
+    """Map stage of map_reduce_summary: shrink texts until they fit one prompt.
+
+    Texts within the token budget are returned joined as-is; larger inputs
+    are split into budget-sized chunks and condensed concurrently (at most
+    MAP_CONCURRENCY at a time) until the partial summaries fit. A round that
+    does not reduce the number of chunks is the last one; its partials are
+    returned together rather than condensed again.
+    """
+    separator = "\n---\n"
+    chunks = chunk_texts(texts, token_budget)
+    
+    while len(chunks) > 1:
+        semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+        
+        async def summarize_chunk(chunk):
+            async with semaphore:
+                return await complete(
+                    build_chunk_prompt(separator.join(chunk)),
+                    system=CHUNK_SYSTEM_PROMPT,
+                    model=model,
+                    max_tokens=CHUNK_MAX_TOKENS,
+                )
+        
+        print(f"Summarizing {len(chunks)} chunks (up to {MAP_CONCURRENCY} at a time)")
+        partials = await asyncio.gather(*(summarize_chunk(chunk) for chunk in chunks))
+        # Partial summaries may still be too large for one prompt; reduce again
+        reduced = chunk_texts(partials, token_budget)
+        if len(reduced) >= len(chunks):
+            # Another round would cost as many calls without shrinking anything
+            reduced = [partials]
+        chunks = reduced
+    
+    return separator.join(chunks[0] if chunks else [])
+
+async def map_reduce_summary(
+    texts: List[str],
+    reduce_prompt: Callable[[str], str],
+    system: str = SYSTEM_PROMPT,
+    model: str = MODEL,
+    max_tokens: int = SUMMARY_MAX_TOKENS,
+    token_budget: int = CHUNK_TOKEN_BUDGET,
+) -> str:
+    """Summarize texts that may not fit one prompt.
+
+    Texts that fit the token budget are summarized in a single call. Larger
+    inputs are condensed chunk by chunk first (see condense_texts), and the
+    partial summaries are then reduced into the final summary with
+    `reduce_prompt`.
+    """
+    updates_text = await condense_texts(texts, model=model, token_budget=token_budget)
+    return await complete(
+        reduce_prompt(updates_text),
+        system=system,
+        model=model,
+        max_tokens=max_tokens,
+    )
+
+def window_hours(messages: List[Message]) -> float:
+    """Hours between the oldest and newest message"""
+    timestamps = [msg.epoch_ms for msg in messages]
+    return round((max(timestamps) - min(timestamps)) / 3600000, 1)
+
+async def generate_summary(messages: List[Message]) -> str:
+    """Generate a summary of the messages using Claude"""
+    cache_key = summary_cache_key(messages, MODEL, PROMPT_VERSION)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    hours_diff = window_hours(messages)
+    
+    try:
+        summary = await map_reduce_summary(
+            [format_message_for_summary(msg) for msg in messages],
+            lambda updates_text: build_summary_prompt(hours_diff, updates_text),
         )
-        return response.content[0].text
+        summary_cache.set(cache_key, summary)
+        return summary
     except Exception as e:
         print(f"Error generating summary: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+async def stream_summary(messages: List[Message]) -> AsyncIterator[str]:
+    """Like generate_summary, but yield the summary text as it is written.
+
+    Cached summaries are yielded whole. Otherwise the map stage runs first
+    and only the final reduce call is streamed; the finished summary is
+    cached just as generate_summary would cache it.
+    """
+    cache_key = summary_cache_key(messages, MODEL, PROMPT_VERSION)
+    cached = summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+    
+    hours_diff = window_hours(messages)
+    
+    try:
+        updates_text = await condense_texts([format_message_for_summary(msg) for msg in messages])
+        parts = []
+        async for text in stream_completion(build_summary_prompt(hours_diff, updates_text)):
+            parts.append(text)
+            yield text
+        summary_cache.set(cache_key, "".join(parts))
+    except Exception as e:
+        print(f"Error streaming summary: {str(e)}")
+        raise
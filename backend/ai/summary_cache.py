@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from scraping.models import Message
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 6 * 3600
+
+def summary_cache_key(messages: Iterable[Message], model: str, prompt_version: str) -> str:
+    """Stable key for a summary of `messages` with a given model and prompt.
+
+    Built from message IDs (and edit times, so edited messages miss), in
+    sorted order so the same set posted in another order hits. Messages
+    built through a projection without the edit time are refused, since
+    their key would never change when they are edited.
+    """
+    parts = []
+    for msg in messages:
+        if 'edited_timestamp' not in msg.projection.fields:
+            raise ValueError(f"Messages projected for {msg.projection.name!r} carry no edit time to key summaries by")
+        parts.append(f"{msg.id}:{msg.edited_timestamp or ''}")
+    parts.sort()
+    digest = hashlib.sha256()
+    digest.update(f"{model}\n{prompt_version}\n".encode('utf-8'))
+    digest.update("\n".join(parts).encode('utf-8'))
+    return digest.hexdigest()
+
+class SummaryCache:
+    """In-memory LRU cache of summaries with TTL and optional SQLite persistence"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries "
+                "(key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[1], row[0])
+                    self._store(key, entry)
+
+            if entry is not None and now - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                if self._conn is not None:
+                    with self._conn:
+                        self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, summary: str):
+        entry = (time.time(), summary)
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)",
+                        (key, summary, entry[0]),
+                    )
+
+    def _store(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'persistent': self._conn is not None,
+            }
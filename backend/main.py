@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
@@ -7,23 +7,43 @@ import os
 from dotenv import load_dotenv
 import json
 import asyncio
-from ai.summarizer import generate_summary
+from ai.summarizer import close_summarizer, generate_summary, stream_summary, summary_cache
 from datetime import datetime, timedelta, timezone
-import requests
+from contextlib import asynccontextmanager
 
 # Change from relative to absolute import
-from scraping.discord_client import (
-    get_guild_channels,
-    get_bot_messages,
-    find_matching_channel
+from scraping.discord_client import get_bot_messages
+from scraping.async_client import (
+    close_client,
+    iter_window_pages
 )
+from scraping.author_filter import feed_filter
+from scraping.broadcast_hub import scrape_hub
+from scraping.channel_directory import get_directory
+from scraping.guild_scraper import scrape_guild
+from scraping.live_follower import get_follower
+from scraping.models import Message, messages_from_discord
+from scraping.projection import FRONTEND, SUMMARY
+from scraping.rate_limiter import scheduler
+from scraping.scrape_sessions import scrape_sessions
+from scraping.serialization import BACKEND as JSON_BACKEND, dumps, join_array, sse_frame
+from scraping.snowflake import datetime_to_snowflake, window_to_snowflake_range
+from scraping.stream_compression import compress_stream, negotiate
+from storage.message_store import get_store
 
 # Load environment variables
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled Discord and Claude connections on shutdown
+    await close_client()
+    await close_summarizer()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -48,72 +68,104 @@ class ScrapeRequest(BaseModel):
     channel_id: str
     hours: int
 
+def event_stream(request: Request, events) -> StreamingResponse:
+    """SSE response for an event generator, compressed when the client accepts it"""
+    headers = {
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+    }
+    encoding = negotiate(request.headers.get('accept-encoding'))
+    if encoding:
+        events = compress_stream(events, encoding)
+        headers['Content-Encoding'] = encoding
+        headers['Vary'] = 'Accept-Encoding'
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+def parse_event_id(value: Optional[str]) -> Optional[int]:
+    """Snowflake from a Last-Event-ID header, or None when it is absent or malformed"""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
 @app.get("/")
 async def root():
     return {"message": "Discord Scraper API"}
 
+@app.get("/api/stats")
+async def get_stats():
+    """Counters for Discord rate limits, shared scrapes and the summary cache"""
+    return {
+        "rate_limits": scheduler.stats(),
+        "scrapes": scrape_hub.stats(),
+        "summary_cache": summary_cache.stats(),
+        "json_backend": JSON_BACKEND,
+    }
+
 @app.get("/api/channels", response_model=List[Channel])
 async def get_channels():
     """Get all available channels"""
     try:
-        channels = get_guild_channels(GUILD_ID)
-        if not channels:
+        # Served from memory; a stale list is refreshed in the background
+        directory = get_directory(GUILD_ID)
+        await directory.ensure_loaded()
+        if not directory.allowed:
             raise HTTPException(status_code=404, detail="No channels found")
         
-        # Filter channels
-        allowed_emojis = {'🟡', '🔴', '🟠', '⚫'}
-        filtered_channels = [
-            channel for channel in channels 
-            if channel['type'] == 0 and
-            (
-                len(channel['name']) > 0 and
-                channel['name'][0] in allowed_emojis and
-                ('godly-chat' not in channel['name'] and channel.get('position', 0) < 30)
-                or channel['parent_id'] == '1112044935982633060'
-            ) 
-        ]
-        
-        return filtered_channels
+        return directory.allowed
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def event_generator(channel_id: str, hours: int):
-    """Generate SSE events for message updates"""
+async def scrape_frames(channel_id: str, after_id: int):
+    """Scrape a channel window once, yielding (last ID, SSE frame or None) per batch"""
+    batch_count = 0
+    async for batch in iter_window_pages(channel_id, after_id):
+        batch_count += 1
+        print(f"\nRead batch {batch_count}...")
+        
+        # Process batch and get bot messages, trimmed to what the browser
+        # renders and encoded once; the frame bytes are then shared by every
+        # viewer of this scrape
+        bot_messages = [Message.from_discord(msg, FRONTEND).to_json() for msg in feed_filter.filter(batch)]
+        
+        # The frame's ID is the page's newest snowflake, so a reconnect resumes
+        # after it; a page without bot messages only moves the ID forward
+        through_id = int(batch[-1]['id'])
+        yield through_id, sse_frame(join_array(bot_messages) if bot_messages else None, event_id=through_id)
+
+async def event_generator(channel_id: str, hours: int, resume_id: Optional[int] = None):
+    """Generate SSE events for message updates, after resume_id when reconnecting"""
     try:
-        last_message_id = None
-        batch_count = 0
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        after_id, _ = window_to_snowflake_range(hours)
         
-        while True:
-            batch_count += 1
-            print(f"\nFetching batch {batch_count}...")
-            
-            # Get batch of messages
-            batch = get_batch_messages(channel_id, last_message_id)
-            if not batch:
-                break
-                
-            # Process batch and get bot messages
-            bot_messages = []
-            for msg in batch:
-                msg_time = datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-                if (msg['author'].get('username') == 'FaytuksBot' and 
-                    msg['author'].get('discriminator') == '7032' and 
-                    msg_time >= cutoff_time):
-                    bot_messages.append(msg)
-            
-            # Send this batch's bot messages immediately
-            if bot_messages:
-                yield f"data: {json.dumps(bot_messages)}\n\n"
-                await asyncio.sleep(0.1)  # Small delay between batches
+        # The messages stay in the store; the session lets /api/summarize
+        # refer to them instead of receiving them back from the browser
+        session = scrape_sessions.create(channel_id, after_id)
+        through_id = max(after_id, resume_id or after_id)
+        yield f"event: session\ndata: {json.dumps({'session_id': session.id})}\n\n"
+        
+        if resume_id is not None and not scrape_hub.running((channel_id, hours)):
+            # The scrape this client was following has finished, so its pages
+            # are in the store; read on from the last one it received
+            frames = scrape_frames(channel_id, through_id)
+        else:
+            # Viewers of the same channel and window share one running scrape;
+            # late joiners get the batches sent so far, then the rest live
+            frames = scrape_hub.open((channel_id, hours), lambda: scrape_frames(channel_id, after_id)).subscribe()
+        async for batch_through_id, frame in frames:
+            through_id = max(through_id, batch_through_id)
+            if resume_id is not None and batch_through_id <= resume_id:
+                # Delivered before the reconnect
+                continue
             
-            # Check if we should stop
-            last_msg_time = datetime.fromisoformat(batch[-1]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-            if last_msg_time < cutoff_time:
-                break
-                
-            last_message_id = batch[-1]['id']
+            # Send this batch's bot messages immediately; the next one is
+            # only taken once this one has been handed to the connection
+            yield frame
             
+        session.through_id = through_id
+        
         # Send completion event
         yield "event: complete\ndata: null\n\n"
         
@@ -121,58 +173,207 @@ async def event_generator(channel_id: str, hours: int):
         print(f"Error in event generator: {str(e)}")
         yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
 
-def get_batch_messages(channel_id: str, last_message_id: Optional[str] = None):
-    """Helper function to get a batch of messages"""
-    headers = {'Authorization': DISCORD_TOKEN}
-    url = f'https://discord.com/api/v10/channels/{channel_id}/messages?limit=100'
-    if last_message_id:
-        url += f'&before={last_message_id}'
-        
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        return None
-        
-    return json.loads(response.text)
-
 @app.get("/api/scrape/{channel_id}")
-async def scrape_channel(channel_id: str, hours: int = 24):
-    """Scrape messages from a channel with SSE"""
+async def scrape_channel(channel_id: str, request: Request, hours: int = 24,
+                         last_event_id: Optional[str] = Header(None)):
+    """Scrape messages from a channel with SSE, resuming after Last-Event-ID on reconnect"""
     try:
         # Validate hours parameter
         if hours not in [6, 12, 24, 48, 72]:
             hours = 24  # Default to 24 if invalid value
             
-        return StreamingResponse(
-            event_generator(channel_id, hours),
-            media_type="text/event-stream",
-            headers={
-                'Cache-Control': 'no-cache',
-                'Connection': 'keep-alive',
-            }
-        )
+        return event_stream(request, event_generator(channel_id, hours, parse_event_id(last_event_id)))
     except Exception as e:
         print(f"Error in scrape endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/summarize")
-async def summarize_messages(request: dict):
-    """Generate an AI summary of the messages"""
+# Seconds between SSE comments on an idle follow stream
+FOLLOW_KEEPALIVE = 15
+
+async def follow_event_generator(channel_id: str, resume_id: Optional[int] = None):
+    """Generate SSE events for feed messages posted after the stream opened,
+    or after resume_id (the last message the client has) when given.
+
+    The follower polls from resume_id, so messages posted while the client
+    was away are sent first. A resume point too old for that gets a `reset`
+    event instead, telling the client to scrape again.
+    """
+    follower = get_follower(channel_id)
+    if resume_id is not None and not follower.can_resume(resume_id):
+        yield sse_frame(b'null', event='reset')
+        resume_id = None
+    queue = follower.subscribe(resume_id)
+    # Nothing at or below this ID is sent, e.g. when another viewer's resume
+    # point makes the follower publish older messages again
+    sent_id = resume_id if resume_id is not None else follower.last_id or 0
+    try:
+        while True:
+            try:
+                messages = await asyncio.wait_for(queue.get(), timeout=FOLLOW_KEEPALIVE)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing the idle connection
+                yield ": keep-alive\n\n"
+                continue
+            messages = [msg for msg in messages if msg.id > sent_id]
+            if messages:
+                sent_id = messages[-1].id
+                yield sse_frame(join_array(msg.to_json() for msg in messages), event_id=sent_id)
+    finally:
+        follower.unsubscribe(queue)
+
+@app.get("/api/follow/{channel_id}")
+async def follow_channel(channel_id: str, request: Request, after_id: Optional[int] = None,
+                         last_event_id: Optional[str] = Header(None)):
+    """Stream a channel's new feed messages with SSE as they are posted.
+
+    `after_id` is where the client's scrape ended (its last event ID); a
+    reconnect's Last-Event-ID takes over from it.
+    """
+    resume_id = parse_event_id(last_event_id)
+    if resume_id is None:
+        resume_id = after_id
+    return event_stream(request, follow_event_generator(channel_id, resume_id))
+
+async def guild_event_generator(hours: int):
+    """Generate SSE events for a guild-wide scrape, one channel event per page"""
     try:
-        messages = request.get("messages", [])
-        hours = request.get("hours", 24)  # Default to 24 hours if not specified
+        async for event in scrape_guild(GUILD_ID, hours, projection=FRONTEND):
+            # Splice in each message's cached JSON rather than re-encoding it
+            messages = join_array(msg.to_json() for msg in event.pop('messages'))
+            data = dumps(event)[:-1] + b',"messages":' + messages + b'}'
+            yield sse_frame(data, event='channel')
         
-        # Filter messages based on timeframe
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        filtered_messages = [
-            msg for msg in messages 
-            if datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc) >= cutoff_time
-        ]
+        yield "event: complete\ndata: null\n\n"
+        
+    except Exception as e:
+        print(f"Error in guild event generator: {str(e)}")
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+@app.get("/api/scrape-guild")
+async def scrape_all_channels(request: Request, hours: int = 24):
+    """Scrape every listed channel at once with SSE progress per channel"""
+    if hours not in [6, 12, 24, 48, 72]:
+        hours = 24
+    
+    return event_stream(request, guild_event_generator(hours))
+
+# Most search results returned at once
+MAX_SEARCH_RESULTS = 200
+
+@app.get("/api/search")
+async def search_messages(q: str, channel_id: Optional[str] = None, hours: Optional[float] = None,
+                          since: Optional[datetime] = None, until: Optional[datetime] = None,
+                          limit: int = 50, order: str = "newest"):
+    """Full-text search over scraped messages and their embeds.
+
+    Narrow it to a channel and to the last `hours` or a `since`/`until`
+    range; results come newest first, or best match first with
+    order=relevance.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty search query")
+    if order not in ("newest", "relevance"):
+        raise HTTPException(status_code=400, detail="order must be 'newest' or 'relevance'")
+    
+    after_id = before_id = None
+    if hours is not None:
+        after_id, _ = window_to_snowflake_range(hours)
+    if since is not None:
+        after_id = datetime_to_snowflake(since) - 1
+    if until is not None:
+        before_id = datetime_to_snowflake(until)
+    
+    results = get_store().search(q, channel_id, after_id, before_id,
+                                 min(max(limit, 1), MAX_SEARCH_RESULTS), order)
+    return {
+        "query": q,
+        "results": [
+            {"channel_id": channel, "message": Message.from_discord(msg, FRONTEND).to_dict(), "snippet": snippet}
+            for channel, msg, snippet in results
+        ],
+    }
+
+async def cancel_on_disconnect(http_request: Request, coro, poll_interval: float = 0.5):
+    """Await `coro`, cancelling it if the HTTP client goes away first"""
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                print("Client disconnected, cancelling summary")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        task.cancel()
+
+def messages_in_window(messages: List[Message], hours: int) -> List[Message]:
+    """Keep the messages posted within the last `hours`"""
+    cutoff_ms = (datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp() * 1000
+    return [msg for msg in messages if msg.epoch_ms >= cutoff_ms]
+
+async def resolve_summary_messages(request: dict) -> List[Message]:
+    """Messages to summarize for a summarize request, newest first.
+
+    The request names a scrape `session_id` or a `channel_id` (read from the
+    message store, syncing whatever is missing), or carries the `messages`
+    themselves; in every case only the last `hours` are kept.
+    """
+    hours = request.get("hours", 24)  # Default to 24 hours if not specified
+    after_id, _ = window_to_snowflake_range(hours)
+    
+    if request.get("session_id"):
+        session = scrape_sessions.get(request["session_id"])
+        if session is None:
+            raise HTTPException(status_code=404, detail="Scrape session not found or expired")
+        
+        messages = get_store().get_messages(session.channel_id, max(after_id, session.after_id), session.through_id)
+        messages = [Message.from_discord(msg, SUMMARY) for msg in feed_filter.filter(messages)]
+    elif request.get("channel_id"):
+        messages = []
+        async for batch in iter_window_pages(request["channel_id"], after_id):
+            messages.extend(Message.from_discord(msg, SUMMARY) for msg in feed_filter.filter(batch))
+    else:
+        return messages_in_window(messages_from_discord(request.get("messages", []), SUMMARY), hours)
+    
+    messages.reverse()
+    return messages
+
+@app.post("/api/summarize")
+async def summarize_messages(request: dict, http_request: Request):
+    """Generate an AI summary of a scrape session, a channel window or posted messages"""
+    try:
+        filtered_messages = await resolve_summary_messages(request)
         
         if not filtered_messages:
             raise HTTPException(status_code=400, detail="No messages found in the specified timeframe")
         
-        summary = await generate_summary(filtered_messages)
+        summary = await cancel_on_disconnect(http_request, generate_summary(filtered_messages))
         return {"summary": summary}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in summarize endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def summary_event_generator(messages: List[Message]):
+    """Generate SSE events carrying the summary text as it is written"""
+    try:
+        async for text in stream_summary(messages):
+            yield f"data: {json.dumps({'text': text})}\n\n"
+        
+        yield "event: complete\ndata: null\n\n"
+        
+    except Exception as e:
+        print(f"Error in summary event generator: {str(e)}")
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+@app.post("/api/summarize/stream")
+async def stream_summarize_messages(request: dict, http_request: Request):
+    """Generate an AI summary like /api/summarize, streamed with SSE"""
+    filtered_messages = await resolve_summary_messages(request)
+    if not filtered_messages:
+        raise HTTPException(status_code=400, detail="No messages found in the specified timeframe")
+    
+    return event_stream(http_request, summary_event_generator(filtered_messages))
@@ -0,0 +1,228 @@
+import asyncio
+import httpx
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple, TypeVar
+from dotenv import load_dotenv
+from scraping.rate_limiter import MAX_RETRIES, backoff_delay, scheduler
+from scraping.serialization import loads
+from scraping.snowflake import datetime_to_snowflake
+from storage.message_store import MessageStore, get_store
+
+# Load environment variables
+load_dotenv()
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10")
+
+# Connection pool settings shared by every request to Discord
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+REQUEST_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+# Pages fetched ahead of the consumer while it stores, filters and sends the current one
+PREFETCH_PAGES = 2
+
+T = TypeVar('T')
+
+_client: Optional[httpx.AsyncClient] = None
+# Requests on the wire, keyed by path and parameters, so identical GETs share one
+_in_flight: Dict[Tuple[str, tuple], asyncio.Future] = {}
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared Discord HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=os.getenv("DISCORD_API_BASE", DISCORD_API_BASE),
+            headers={'Authorization': os.getenv("DISCORD_TOKEN", DISCORD_TOKEN) or ''},
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=REQUEST_TIMEOUT,
+        )
+    return _client
+
+async def close_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _forget_request(key: Tuple[str, tuple], request: asyncio.Future):
+    _in_flight.pop(key, None)
+    if not request.cancelled():
+        # Retrieve the error so it is not reported when every caller gave up
+        request.exception()
+
+async def discord_get(path: str, params: Optional[dict] = None) -> httpx.Response:
+    """GET a Discord API path through the shared rate limit scheduler.
+
+    429 and 5xx responses are retried after `retry_after` (or an exponential
+    backoff); the last response is returned once retries are exhausted.
+    Concurrent calls for the same path and parameters share one request.
+    """
+    key = (path, tuple(sorted((params or {}).items())))
+    request = _in_flight.get(key)
+    if request is None:
+        request = asyncio.ensure_future(_discord_get(path, params))
+        _in_flight[key] = request
+        request.add_done_callback(lambda done: _forget_request(key, done))
+    # Shielded so one caller giving up does not cancel it for the others
+    return await asyncio.shield(request)
+
+async def _discord_get(path: str, params: Optional[dict] = None) -> httpx.Response:
+    for attempt in range(MAX_RETRIES + 1):
+        await scheduler.acquire(path)
+        response = await get_client().get(path, params=params)
+
+        body = None
+        if response.status_code == 429:
+            try:
+                body = loads(response.content)
+            except ValueError:
+                pass
+        retry_after = scheduler.update(path, response.status_code, response.headers, body)
+        if retry_after is None or attempt == MAX_RETRIES:
+            return response
+
+        print(f"Discord returned {response.status_code} for {path}, retrying ({attempt + 1}/{MAX_RETRIES})")
+        if response.status_code != 429:
+            delay = backoff_delay(attempt, retry_after)
+            scheduler.record_wait(delay)
+            await asyncio.sleep(delay)
+    return response
+
+async def fetch_guild_channels(guild_id: str) -> Optional[List[dict]]:
+    """Get all channels of a guild, or None if Discord refused the request"""
+    try:
+        response = await discord_get(f'/guilds/{guild_id}/channels')
+        if response.status_code != 200:
+            print(f"Failed to retrieve channels: {response.status_code}")
+            return None
+        return loads(response.content)
+    except httpx.HTTPError as e:
+        print(f"Error retrieving channels: {e}")
+        return None
+
+async def fetch_messages(
+    channel_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 100,
+) -> Optional[List[dict]]:
+    """Get one page of channel messages, newest first"""
+    params = {'limit': limit}
+    if before:
+        params['before'] = before
+    if after:
+        params['after'] = after
+
+    try:
+        response = await discord_get(f'/channels/{channel_id}/messages', params=params)
+        if response.status_code != 200:
+            print(f"Failed to retrieve messages: {response.status_code}")
+            return None
+        return loads(response.content)
+    except httpx.HTTPError as e:
+        print(f"Error retrieving messages: {e}")
+        return None
+
+async def iter_message_pages(
+    channel_id: str,
+    after_id: int,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> AsyncIterator[List[dict]]:
+    """Yield pages of messages with after_id < id < before_id, oldest first.
+
+    Pages forward from the window edge with `after=`, so nothing older than
+    the window is ever downloaded. Messages in each page are in ascending ID
+    order. Raises httpx.HTTPStatusError if a page cannot be retrieved.
+    """
+    cursor = after_id
+    while True:
+        response = await discord_get(
+            f'/channels/{channel_id}/messages',
+            params={'limit': limit, 'after': str(cursor)},
+        )
+        response.raise_for_status()
+        batch = loads(response.content)
+        if not batch:
+            return
+        batch.reverse()
+
+        if before_id is not None and int(batch[-1]['id']) >= before_id:
+            page = [msg for msg in batch if int(msg['id']) < before_id]
+            if page:
+                yield page
+            return
+
+        yield batch
+        if len(batch) < limit:
+            return
+        cursor = int(batch[-1]['id'])
+
+async def prefetch(source: AsyncIterator[T], depth: int = PREFETCH_PAGES) -> AsyncIterator[T]:
+    """Run an async iterator ahead of its consumer in a background task.
+
+    Up to `depth` items wait in a bounded queue, so the next page request is
+    on the wire while the caller handles the current page, and a slow caller
+    stalls the producer instead of letting pages pile up. Errors from the
+    source are re-raised here after the items before them; the producer is
+    cancelled if the caller stops early.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    async def produce():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((done, e))
+        else:
+            await queue.put((done, None))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        producer.cancel()
+
+async def iter_window_pages(
+    channel_id: str,
+    after_id: int,
+    store: Optional[MessageStore] = None,
+) -> AsyncIterator[List[dict]]:
+    """Yield every message after after_id in ascending pages, reading through the store.
+
+    Ranges already synced are served from the local store; only the rest is
+    downloaded from Discord, saved, and marked as synced. Downloads run
+    ahead of the caller (see prefetch).
+    """
+    store = store or get_store()
+    for step, range_after, range_end in store.plan_sync(channel_id, after_id):
+        if step == 'local':
+            for page in store.iter_pages(channel_id, range_after, range_end):
+                yield page
+            continue
+
+        through_id = range_after if range_end is None else range_end - 1
+        # Everything up to now exists already, so a stored message up to here
+        # that the download does not return has been deleted
+        checked_id = through_id if range_end is not None else datetime_to_snowflake(datetime.now(timezone.utc))
+        seen_ids = set()
+        async for page in prefetch(iter_message_pages(channel_id, range_after, range_end)):
+            store.save_messages(channel_id, page)
+            seen_ids.update(int(msg['id']) for msg in page)
+            through_id = max(through_id, int(page[-1]['id']))
+            yield page
+        store.prune_deleted(channel_id, range_after, checked_id, seen_ids)
+        store.mark_synced(channel_id, range_after, through_id)
@@ -0,0 +1,83 @@
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+# Feeds followed when FEED_BOTS is not set
+DEFAULT_FEEDS = "faytuks=FaytuksBot#7032"
+
+def parse_feeds(spec: str) -> Dict[str, List[str]]:
+    """Parse "name=key,name=key,..." into {feed name: [author keys]}.
+
+    An author key is a user ID or a legacy "username#discriminator" tag; a
+    name may be repeated to follow several authors under one feed.
+    """
+    feeds: Dict[str, List[str]] = defaultdict(list)
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, key = entry.partition('=')
+        if not key:
+            raise ValueError(f"Feed entry {entry!r} must look like name=author")
+        feeds[name.strip()].append(key.strip())
+    return dict(feeds)
+
+class AuthorFilter:
+    """Split messages across author subscriptions in a single pass.
+
+    Built once from {subscription name: author keys}. Messages are matched
+    by author ID with one dict lookup; legacy tags are only checked for
+    authors not seen before, and a match is remembered under their ID.
+    Authors matching nothing are not remembered, so the ID map stays the
+    size of the followed authors however many others post.
+    A page is split for every subscription at once, so following N bots
+    costs one scrape rather than N.
+    """
+
+    def __init__(self, subscriptions: Dict[str, Iterable[str]]):
+        by_id: Dict[str, List[str]] = defaultdict(list)
+        by_tag: Dict[str, List[str]] = defaultdict(list)
+        for name, keys in subscriptions.items():
+            for key in keys:
+                if key.isdigit():
+                    by_id[key].append(name)
+                else:
+                    # Migrated usernames have no discriminator ("#0")
+                    by_tag[key if '#' in key else f"{key}#0"].append(name)
+        self.names: Tuple[str, ...] = tuple(subscriptions)
+        self._by_id = {key: tuple(names) for key, names in by_id.items()}
+        self._by_tag = {key: tuple(names) for key, names in by_tag.items()}
+
+    @classmethod
+    def from_env(cls) -> "AuthorFilter":
+        return cls(parse_feeds(os.getenv("FEED_BOTS", DEFAULT_FEEDS)))
+
+    def subscriptions_for(self, msg: dict) -> Tuple[str, ...]:
+        """Names of the subscriptions a raw Discord message belongs to"""
+        author = msg['author']
+        names = self._by_id.get(author.get('id'))
+        if names is None:
+            names = ()
+            if self._by_tag:
+                names = self._by_tag.get(f"{author.get('username')}#{author.get('discriminator')}", ())
+            if names and author.get('id'):
+                self._by_id[author['id']] = names
+        return names
+
+    def matches(self, msg: dict) -> bool:
+        """Whether any subscription follows the author of `msg`"""
+        return bool(self.subscriptions_for(msg))
+
+    def filter(self, page: List[dict]) -> List[dict]:
+        """Messages of `page` that any subscription follows, in order"""
+        return [msg for msg in page if self.subscriptions_for(msg)]
+
+    def split(self, page: List[dict]) -> Dict[str, List[dict]]:
+        """{subscription name: its messages from `page`}, in one pass"""
+        feeds: Dict[str, List[dict]] = {name: [] for name in self.names}
+        for msg in page:
+            for name in self.subscriptions_for(msg):
+                feeds[name].append(msg)
+        return feeds
+
+feed_filter = AuthorFilter.from_env()
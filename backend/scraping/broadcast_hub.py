@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+# Items the producer may run ahead of its slowest subscriber
+MAX_LEAD = 2
+
+class Broadcast:
+    """One running producer whose items are shared by every subscriber.
+
+    Items are kept in a replay buffer, so a subscriber joining late first
+    receives everything produced so far and then follows the live tail.
+    The buffer holds the whole run (for a scrape, the encoded frames of
+    the window, about what one client receives) until the broadcast ends.
+
+    While anyone is subscribed the producer stays at most `lead` items
+    ahead of the slowest subscriber, so a slow client slows the upstream
+    pagination instead of letting the buffer run ahead of it. With no
+    subscribers left the producer runs to completion, so its work (e.g.
+    filling the message store) is not wasted.
+    """
+
+    def __init__(self, source: AsyncIterator[Any], lead: int = MAX_LEAD):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.lead = lead
+        # Items handed to each subscriber so far
+        self._positions: Dict[object, int] = {}
+        self._changed = asyncio.Condition()
+        self._task = asyncio.create_task(self._pump(source))
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._positions)
+
+    def _may_produce(self) -> bool:
+        return not self._positions or len(self.items) - min(self._positions.values()) < self.lead
+
+    async def _pump(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                async with self._changed:
+                    await self._changed.wait_for(self._may_produce)
+                    self.items.append(item)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every item from the first, then live ones until the producer ends.
+
+        Re-raises the producer's error after the items it managed to produce.
+        """
+        token = object()
+        self._positions[token] = 0
+        try:
+            index = 0
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.items) or self.done)
+                    available = len(self.items)
+                while index < available:
+                    yield self.items[index]
+                    index += 1
+                    # Taken by the consumer: the producer may move on
+                    async with self._changed:
+                        self._positions[token] = index
+                        self._changed.notify_all()
+                if self.done and index == len(self.items):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            async with self._changed:
+                del self._positions[token]
+                self._changed.notify_all()
+
+class BroadcastHub:
+    """Shares running producers between callers asking for the same key.
+
+    While a producer for a key is running, `open` hands back the same
+    Broadcast instead of starting another, so upstream work scales with
+    distinct keys rather than with viewers. Finished broadcasts are dropped;
+    the next caller starts a fresh one.
+    """
+
+    def __init__(self):
+        self._broadcasts: Dict[Hashable, Broadcast] = {}
+
+    def open(self, key: Hashable, source: Callable[[], AsyncIterator[Any]]) -> Broadcast:
+        broadcast = self._broadcasts.get(key)
+        if broadcast is None or broadcast.done:
+            broadcast = self._broadcasts[key] = Broadcast(source())
+            broadcast._task.add_done_callback(lambda _: self._forget(key, broadcast))
+        return broadcast
+
+    def running(self, key: Hashable) -> bool:
+        """Whether a producer for key is still running"""
+        broadcast = self._broadcasts.get(key)
+        return broadcast is not None and not broadcast.done
+
+    def _forget(self, key: Hashable, broadcast: Broadcast):
+        if self._broadcasts.get(key) is broadcast:
+            del self._broadcasts[key]
+
+    def stats(self) -> dict:
+        return {
+            'running': len(self._broadcasts),
+            'subscribers': sum(broadcast.subscribers for broadcast in self._broadcasts.values()),
+        }
+
+scrape_hub = BroadcastHub()
@@ -0,0 +1,167 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from scraping.async_client import fetch_guild_channels
+from scraping.discord_client import filter_channels, filter_script_channels, get_guild_channels
+
+# Seconds a channel list is served before it is fetched again
+DEFAULT_TTL = 300
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'channels.json')
+
+def normalize_name(name: str) -> str:
+    """Lowercase channel name without its leading emoji and separators"""
+    name = name.lower()
+    for index, char in enumerate(name):
+        if char.isalnum():
+            return name[index:]
+    return name
+
+def channels_fingerprint(channels: List[dict]) -> str:
+    """Hash of a channel list, used to tell whether a refetch changed anything"""
+    payload = json.dumps(channels, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ChannelDirectory:
+    """Cached channel list of one guild with filtered views and a name index.
+
+    The list is kept for `ttl` seconds. A refetch whose content hash matches
+    the cached one only extends its lifetime; otherwise the allowed views
+    (filter_channels for the backend, filter_script_channels for the script
+    menus) and the name index are rebuilt once, so lookups never
+    rescan or refilter. With `cache_path` the list is also kept on disk for
+    short-lived processes such as the scripts.
+    """
+
+    def __init__(self, guild_id: str, ttl: float = DEFAULT_TTL, cache_path: Optional[str] = None):
+        self.guild_id = guild_id
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.channels: List[dict] = []
+        self.allowed: List[dict] = []
+        self.script_allowed: List[dict] = []
+        self.fingerprint: Optional[str] = None
+        self.fetched_at = 0.0
+        self._by_id: Dict[str, dict] = {}
+        # Sorted (normalized name, position in self.channels) for prefix search
+        self._names: List[tuple] = []
+        self._refresh: Optional[asyncio.Task] = None
+        if cache_path:
+            self._read_cache()
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+
+    def load(self, channels: List[dict]):
+        """Install a freshly fetched channel list"""
+        self._install(channels)
+        self.fetched_at = time.time()
+        if self.cache_path:
+            self._write_cache()
+
+    def _install(self, channels: List[dict]):
+        fingerprint = channels_fingerprint(channels)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.channels = channels
+            self.allowed = filter_channels(channels)
+            self.script_allowed = filter_script_channels(channels)
+            self._by_id = {channel['id']: channel for channel in channels}
+            self._names = sorted(
+                (normalize_name(channel['name']), index) for index, channel in enumerate(channels)
+            )
+
+    async def refresh(self) -> bool:
+        channels = await fetch_guild_channels(self.guild_id)
+        if channels is None:
+            return False
+        self.load(channels)
+        return True
+
+    async def ensure_loaded(self):
+        """Make sure channels are available, refreshing stale ones in the background"""
+        if not self.fingerprint:
+            if not await self.refresh():
+                raise RuntimeError("Failed to retrieve channels")
+        elif self.stale and (self._refresh is None or self._refresh.done()):
+            # Serve the cached list now; the next caller gets the new one
+            self._refresh = asyncio.create_task(self.refresh())
+
+    def ensure_loaded_sync(self):
+        """Blocking variant for the scripts: refetch whenever the cache is stale"""
+        if self.fingerprint and not self.stale:
+            return
+        channels = get_guild_channels(self.guild_id)
+        if channels is not None:
+            self.load(channels)
+        elif not self.fingerprint:
+            raise RuntimeError("Failed to retrieve channels")
+
+    def get(self, channel_id: str) -> Optional[dict]:
+        return self._by_id.get(channel_id)
+
+    def find(self, search_term: str) -> Optional[dict]:
+        """Best channel for a search term.
+
+        Tries an exact name, then a name prefix, then a substring; names are
+        compared without their emoji. None when nothing matches, so a typo
+        never silently picks another channel.
+        """
+        term = normalize_name(search_term)
+        if not term:
+            return None
+
+        index = bisect.bisect_left(self._names, (term,))
+        if index < len(self._names) and self._names[index][0].startswith(term):
+            # Exact and prefix matches both sort first; the shortest name wins
+            prefix_matches = []
+            while index < len(self._names) and self._names[index][0].startswith(term):
+                prefix_matches.append(self._names[index])
+                index += 1
+            return self.channels[min(prefix_matches, key=lambda entry: len(entry[0]))[1]]
+
+        for name, position in self._names:
+            if term in name:
+                return self.channels[position]
+        return None
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get('guild_id') == self.guild_id:
+            self._install(cached['channels'])
+            self.fetched_at = cached['fetched_at']
+
+    def _write_cache(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'guild_id': self.guild_id,
+                'fetched_at': self.fetched_at,
+                'channels': self.channels,
+            }, f, ensure_ascii=False)
+
+_directories: Dict[str, ChannelDirectory] = {}
+
+def get_directory(guild_id: str, persistent: bool = False) -> ChannelDirectory:
+    """Return the process-wide directory of a guild, creating it on first use.
+
+    With persistent=True the list is also cached on disk (CHANNEL_CACHE_PATH,
+    default data/channels.json), so repeated script runs skip the fetch.
+    """
+    directory = _directories.get(guild_id)
+    if directory is None:
+        directory = _directories[guild_id] = ChannelDirectory(
+            guild_id,
+            ttl=float(os.getenv("CHANNEL_CACHE_TTL", DEFAULT_TTL)),
+            cache_path=os.getenv("CHANNEL_CACHE_PATH", DEFAULT_CACHE_PATH) if persistent else None,
+        )
+    return directory
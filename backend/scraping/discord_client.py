@@ -1,112 +1,221 @@
 import requests
-import json
 import os
-from datetime import datetime, timedelta, timezone
+from collections import deque
+import queue
+import threading
+import time
+from datetime import datetime, timezone
 from colorama import Fore, Style
 from dotenv import load_dotenv
 import emoji
+from scraping.author_filter import feed_filter
+from scraping.models import Message
+from scraping.rate_limiter import MAX_RETRIES, backoff_delay, scheduler
+from scraping.serialization import loads
+from scraping.snowflake import datetime_to_snowflake, snowflake_to_datetime, window_to_snowflake_range
+from storage.message_store import get_store
 
 # Load environment variables
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")
+DISCORD_API_BASE = os.getenv("DISCORD_API_BASE", "https://discord.com/api/v10")
 
-def get_guild_channels(guild_id):
+# Keep-alive session shared by every request to Discord
+session = requests.Session()
+# Pages fetched ahead of the consumer while it stores, filters and writes the current one
+PREFETCH_PAGES = 2
+
+def discord_get(path, params=None):
+    """GET a Discord API path through the shared rate limit scheduler.
+    
+    429 and 5xx responses are retried after `retry_after` (or an exponential
+    backoff); the last response is returned once retries are exhausted.
+    """
     headers = {
         'Authorization': DISCORD_TOKEN
     }
     
+    for attempt in range(MAX_RETRIES + 1):
+        scheduler.acquire_sync(path)
+        response = session.get(f'{DISCORD_API_BASE}{path}', headers=headers, params=params)
+        
+        body = None
+        if response.status_code == 429:
+            try:
+                body = loads(response.content)
+            except ValueError:
+                pass
+        retry_after = scheduler.update(path, response.status_code, response.headers, body)
+        if retry_after is None or attempt == MAX_RETRIES:
+            return response
+        
+        print(Fore.YELLOW + f"Discord returned {response.status_code} for {path}, retrying ({attempt + 1}/{MAX_RETRIES})" + Style.RESET_ALL)
+        if response.status_code != 429:
+            delay = backoff_delay(attempt, retry_after)
+            scheduler.record_wait(delay)
+            time.sleep(delay)
+    return response
+
+def get_guild_channels(guild_id):
     try:
         print(Fore.YELLOW + "Retrieving channels from server..." + Style.RESET_ALL)
-        url = f'https://discord.com/api/v10/guilds/{guild_id}/channels'
         
-        response = requests.get(url, headers=headers)
+        response = discord_get(f'/guilds/{guild_id}/channels')
         
         if response.status_code != 200:
             print(Fore.RED + f"Failed to retrieve channels: {response.status_code}" + Style.RESET_ALL)
             return None
         
-        channels = json.loads(response.text)
+        channels = loads(response.content)
         return channels
             
     except requests.exceptions.RequestException as e:
         print(Fore.RED + f"Error retrieving channels: {e}" + Style.RESET_ALL)
         return None
 
-def get_bot_messages(channel_id, bot_id="7032", hours=24):
-    headers = {
-        'Authorization': DISCORD_TOKEN
-    }
+def fetch_messages(channel_id, before=None, after=None, limit=100):
+    """Get one page of channel messages (newest first), or None on failure"""
+    params = {'limit': limit}
+    if before:
+        params['before'] = before
+    if after:
+        params['after'] = after
+    
+    response = discord_get(f'/channels/{channel_id}/messages', params=params)
+    
+    if response.status_code != 200:
+        print(f"Error response ({response.status_code}): {response.text}")
+        return None
+    
+    return loads(response.content)
+
+def iter_message_pages(channel_id, after_id, before_id=None, limit=100):
+    """Yield pages of messages with after_id < id < before_id, oldest first.
+    
+    Pages forward from the window edge with `after=`, so nothing older than
+    the window is ever downloaded. Messages in each page are in ascending ID
+    order. Raises requests.HTTPError if a page cannot be retrieved.
+    """
+    cursor = after_id
+    while True:
+        response = discord_get(f'/channels/{channel_id}/messages', params={'limit': limit, 'after': cursor})
+        response.raise_for_status()
+        batch = loads(response.content)
+        if not batch:
+            return
+        batch.reverse()
+        
+        if before_id is not None and int(batch[-1]['id']) >= before_id:
+            page = [msg for msg in batch if int(msg['id']) < before_id]
+            if page:
+                yield page
+            return
+        
+        yield batch
+        if len(batch) < limit:
+            return
+        cursor = int(batch[-1]['id'])
+
+def prefetch(source, depth=PREFETCH_PAGES):
+    """Run an iterator ahead of its consumer in a background thread.
+    
+    Up to `depth` items wait in a bounded queue, so the next page request is
+    on the wire while the caller handles the current page. Errors from the
+    source are re-raised here; the thread stops if the caller stops early.
+    """
+    items = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    done = object()
+    
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
     
+    def produce():
+        try:
+            for item in source:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((done, e))
+        else:
+            put((done, None))
+    
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+def iter_window_pages(channel_id, after_id, store=None):
+    """Yield every message after after_id in ascending pages, reading through the store.
+    
+    Ranges already synced are served from the local store; only the rest is
+    downloaded from Discord, saved, and marked as synced. Downloads run
+    ahead of the caller (see prefetch).
+    """
+    store = store or get_store()
+    for step, range_after, range_end in store.plan_sync(channel_id, after_id):
+        if step == 'local':
+            yield from store.iter_pages(channel_id, range_after, range_end)
+            continue
+        
+        through_id = range_after if range_end is None else range_end - 1
+        # Everything up to now exists already, so a stored message up to here
+        # that the download does not return has been deleted
+        checked_id = through_id if range_end is not None else datetime_to_snowflake(datetime.now(timezone.utc))
+        seen_ids = set()
+        for page in prefetch(iter_message_pages(channel_id, range_after, range_end)):
+            store.save_messages(channel_id, page)
+            seen_ids.update(int(msg['id']) for msg in page)
+            through_id = max(through_id, int(page[-1]['id']))
+            yield page
+        store.prune_deleted(channel_id, range_after, checked_id, seen_ids)
+        store.mark_synced(channel_id, range_after, through_id)
+
+def get_bot_messages(channel_id, hours=24):
     try:
         print(f"Starting scrape for channel {channel_id} for last {hours} hours")
         print(f"Using Discord token: {DISCORD_TOKEN[:10]}...")  # Show first 10 chars only
         
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        print(f"Cutoff time: {cutoff_time} UTC")
+        after_id, _ = window_to_snowflake_range(hours)
+        print(f"Cutoff time: {snowflake_to_datetime(after_id)} UTC")
         
-        bot_messages = []
-        last_message_id = None
+        # Pages arrive oldest first, so the whole window is read and only the
+        # newest MAX_MESSAGES bot messages are kept
         MAX_MESSAGES = 1000
+        bot_messages = deque(maxlen=MAX_MESSAGES)
         batch_count = 0
+        total = 0
         
-        while True:
+        for batch in iter_window_pages(channel_id, after_id):
             batch_count += 1
-            url = f'https://discord.com/api/v10/channels/{channel_id}/messages?limit=100'
-            if last_message_id:
-                url += f'&before={last_message_id}'
-            
-            print(f"\nFetching batch {batch_count}...")
-            print(f"URL: {url}")
-            
-            response = requests.get(url, headers=headers)
+            print(f"\nRead batch {batch_count}: {len(batch)} messages")
+            print(f"Batch time range: {snowflake_to_datetime(batch[0]['id'])} to {snowflake_to_datetime(batch[-1]['id'])} UTC")
             
-            print(f"Response status: {response.status_code}")
+            batch_bot_messages = [Message.from_discord(msg) for msg in feed_filter.filter(batch)]
+            bot_messages.extend(batch_bot_messages)
+            total += len(batch_bot_messages)
             
-            if response.status_code != 200:
-                print(f"Error response: {response.text}")
-                break
-            
-            batch = json.loads(response.text)
-            print(f"Received {len(batch)} messages in batch")
-            
-            if not batch:
-                print("Empty batch received, stopping")
-                break
-            
-            # Debug first and last message timestamps in batch
-            first_msg_time = datetime.fromisoformat(batch[0]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-            last_msg_time = datetime.fromisoformat(batch[-1]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-            print(f"Batch time range: {first_msg_time} to {last_msg_time} UTC")
-            
-            batch_bot_messages = 0
-            for msg in batch:
-                username = msg['author'].get('username')
-                discriminator = msg['author'].get('discriminator')
-                msg_time = datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-                
-                if username == 'FaytuksBot' and discriminator == bot_id and msg_time >= cutoff_time:
-                    bot_messages.append(msg)
-                    batch_bot_messages += 1
-            
-            print(f"Found {batch_bot_messages} bot messages in this batch")
-            print(f"Total bot messages so far: {len(bot_messages)}")
-            
-            if len(bot_messages) >= MAX_MESSAGES:
-                print(f"Reached message limit ({MAX_MESSAGES}), stopping")
-                break
-            
-            if len(batch) < 100:
-                print("Incomplete batch, stopping")
-                break
-            
-            if last_msg_time < cutoff_time:
-                print("Reached cutoff time, stopping")
-                break
-                
-            last_message_id = batch[-1]['id']
-            print(f"Setting last_message_id to {last_message_id}")
+            print(f"Found {len(batch_bot_messages)} bot messages in this batch")
+            print(f"Total bot messages so far: {total}")
 
+        if total > MAX_MESSAGES:
+            print(f"Reached message limit ({MAX_MESSAGES}), keeping the newest")
+        # Callers expect newest first
+        bot_messages = list(reversed(bot_messages))
         print(f"\nScraping complete. Total messages found: {len(bot_messages)}")
         return bot_messages
 
@@ -116,11 +225,28 @@ def get_bot_messages(channel_id, bot_id="7032", hours=24):
         print(traceback.format_exc())
         return []
 
-def find_matching_channel(channels, search_term):
-    search_term = search_term.lower()
-    
-    for channel in channels:
-        channel_name = channel['name'].lower()
-        if search_term in channel_name:
-            return channel
-    return None
\ No newline at end of file
+def filter_channels(channels):
+    """Text channels that are offered for scraping"""
+    allowed_emojis = {'🟡', '🔴', '🟠', '⚫'}
+    return [
+        channel for channel in channels 
+        if channel['type'] == 0 and
+        (
+            len(channel['name']) > 0 and
+            channel['name'][0] in allowed_emojis and
+            ('godly-chat' not in channel['name'] and channel.get('position', 0) < 30)
+            or channel.get('parent_id') == '1112044935982633060'
+        ) 
+    ]
+
+def filter_script_channels(channels):
+    """Text channels the scripts offer in their menus; wider than the
+    backend's list (positions below 40) but single-emoji names only"""
+    allowed_emojis = {'🟡', '🔴', '🟠', '⚫'}
+    return [
+        channel for channel in channels
+        if channel['type'] == 0 and  # 0 is the type for text channels
+        len(emoji.emoji_list(channel['name'])) == 1 and  # Only one emoji at the start
+        channel['name'][0] in allowed_emojis and
+        ('godly-chat' not in channel['name'] and channel.get('position', 0) < 40)
+    ]
@@ -0,0 +1,83 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from scraping.async_client import iter_window_pages
+from scraping.author_filter import AuthorFilter, feed_filter
+from scraping.channel_directory import get_directory
+from scraping.models import Message
+from scraping.projection import FULL, Projection
+from scraping.snowflake import window_to_snowflake_range
+
+# Channels scraped at the same time; each channel has its own rate limit
+# bucket, so this mainly bounds open connections and the global limit
+DEFAULT_CONCURRENCY = 8
+
+async def scrape_guild(
+    guild_id: str,
+    hours: int,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    channels: Optional[List[dict]] = None,
+    feeds: AuthorFilter = feed_filter,
+    projection: Projection = FULL,
+) -> AsyncIterator[dict]:
+    """Scrape the last `hours` of every listed channel concurrently.
+
+    Yields progress events as they happen across channels:
+    {'channel_id', 'name', 'status', 'count', 'messages'} where status is
+    'started', 'page', 'done' or 'error'. Each page is split across the
+    `feeds` subscriptions in one pass; a 'page' event carries one feed's
+    messages from that page as Message objects, named by its 'feed' key,
+    holding only the fields of `projection`.
+    """
+    if channels is None:
+        directory = get_directory(guild_id)
+        await directory.ensure_loaded()
+        channels = directory.allowed
+
+    after_id, _ = window_to_snowflake_range(hours)
+    semaphore = asyncio.Semaphore(concurrency)
+    events: asyncio.Queue = asyncio.Queue()
+
+    def event(channel, status, count, messages=None, error=None, feed=None):
+        payload = {
+            'channel_id': channel['id'],
+            'name': channel['name'],
+            'status': status,
+            'count': count,
+            'messages': messages or [],
+        }
+        if feed:
+            payload['feed'] = feed
+        if error:
+            payload['error'] = error
+        return payload
+
+    async def scrape_channel(channel):
+        count = 0
+        async with semaphore:
+            try:
+                await events.put(event(channel, 'started', count))
+                async for page in iter_window_pages(channel['id'], after_id):
+                    for feed, raw_messages in feeds.split(page).items():
+                        if not raw_messages:
+                            continue
+                        count += len(raw_messages)
+                        messages = [Message.from_discord(msg, projection) for msg in raw_messages]
+                        await events.put(event(channel, 'page', count, messages, feed=feed))
+                await events.put(event(channel, 'done', count))
+            except Exception as e:
+                print(f"Error scraping channel {channel['name']}: {str(e)}")
+                await events.put(event(channel, 'error', count, error=str(e)))
+
+    tasks = [asyncio.create_task(scrape_channel(channel)) for channel in channels]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await events.get()
+            if item['status'] in ('done', 'error'):
+                remaining -= 1
+            yield item
+    finally:
+        # Stop outstanding channels if the consumer goes away
+        for task in tasks:
+            task.cancel()
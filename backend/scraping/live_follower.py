@@ -0,0 +1,154 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from scraping.async_client import iter_message_pages
+from scraping.author_filter import AuthorFilter, feed_filter
+from scraping.models import Message
+from scraping.projection import FRONTEND, Projection
+from scraping.snowflake import datetime_to_snowflake
+from storage.message_store import MessageStore, get_store
+
+# Poll quickly while a channel is busy and back off while it is quiet
+MIN_POLL_INTERVAL = float(os.getenv("FOLLOW_MIN_INTERVAL", 2))
+MAX_POLL_INTERVAL = float(os.getenv("FOLLOW_MAX_INTERVAL", 30))
+POLL_BACKOFF = 1.5
+# A follower continues from the stored sync point if it is at most this old
+RESUME_WINDOW = timedelta(minutes=10)
+# How far back a viewer's own resume point is polled from; older ones must scrape again
+MAX_BACKFILL = timedelta(hours=1)
+# Batches buffered per subscriber before the oldest is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+class ChannelFollower:
+    """Polls one channel for new messages and fans them out to subscribers.
+
+    A single background task asks Discord for messages after the newest one
+    seen, saves them to the message store and puts every new batch of feed
+    messages on each subscriber's queue, so N viewers cost one upstream
+    poll. The task starts with the first subscriber and stops after the
+    last one leaves. Subscribers are browser streams, so published
+    messages only hold the fields of the frontend projection.
+    """
+
+    def __init__(self, channel_id: str, store: Optional[MessageStore] = None,
+                 feeds: AuthorFilter = feed_filter, projection: Projection = FRONTEND):
+        self.channel_id = channel_id
+        self.store = store or get_store()
+        self.feeds = feeds
+        self.projection = projection
+        self.last_id: Optional[int] = None
+        # Earliest resume point asked for by a viewer joining a running task
+        self._rewind_id: Optional[int] = None
+        self.interval = MIN_POLL_INTERVAL
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def subscribe(self, after_id: Optional[int] = None) -> asyncio.Queue:
+        """Queue receiving each new batch of feed messages (List[Message]).
+
+        `after_id` is the newest message the viewer already has (e.g. the end
+        of its scrape or its Last-Event-ID). Polling then starts from it, so
+        everything posted since is published again, at most MAX_BACKFILL back
+        (see can_resume); subscribers drop the messages they already sent.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        start_id = None if after_id is None else max(after_id, self._backfill_id())
+        if self._task is None or self._task.done():
+            # A position left over from an earlier run may be long stale
+            self.last_id = self._start_id() if start_id is None else start_id
+            self._rewind_id = None
+            self._task = asyncio.create_task(self._run())
+        else:
+            if start_id is not None and (self._rewind_id is None or start_id < self._rewind_id):
+                self._rewind_id = start_id
+            # Poll right away so a new viewer does not wait out a long backoff
+            self.interval = MIN_POLL_INTERVAL
+            self._wake.set()
+        return queue
+
+    def can_resume(self, after_id: int) -> bool:
+        """Whether subscribe(after_id) catches up on everything after after_id"""
+        return after_id >= self._backfill_id()
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _backfill_id(self) -> int:
+        return datetime_to_snowflake(datetime.now(timezone.utc) - MAX_BACKFILL)
+
+    def _start_id(self) -> int:
+        now = datetime.now(timezone.utc)
+        start_id = datetime_to_snowflake(now)
+        coverage = self.store.coverage(self.channel_id)
+        if coverage and coverage[1] >= datetime_to_snowflake(now - RESUME_WINDOW):
+            # Pick up right where the last scrape stopped
+            start_id = coverage[1]
+        return start_id
+
+    async def poll(self) -> List[dict]:
+        """Fetch, store and return every message newer than the last one seen"""
+        if self.last_id is None:
+            self.last_id = self._start_id()
+        if self._rewind_id is not None:
+            # A viewer joined with an older resume point than the current one
+            self.last_id = min(self.last_id, self._rewind_id)
+            self._rewind_id = None
+
+        after_id = self.last_id
+        messages = []
+        async for page in iter_message_pages(self.channel_id, after_id):
+            self.store.save_messages(self.channel_id, page)
+            messages.extend(page)
+        if messages:
+            self.last_id = int(messages[-1]['id'])
+            # Extend the synced range only when it reaches up to where we started
+            coverage = self.store.coverage(self.channel_id)
+            if coverage and coverage[1] >= after_id:
+                self.store.mark_synced(self.channel_id, after_id, self.last_id)
+        return messages
+
+    def publish(self, messages: List[Message]):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Slow viewer: drop its oldest batch rather than stall everyone
+                queue.get_nowait()
+            queue.put_nowait(messages)
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                new_messages = await self.poll()
+                feed_messages = [Message.from_discord(msg, self.projection) for msg in self.feeds.filter(new_messages)]
+                if feed_messages:
+                    self.publish(feed_messages)
+                if new_messages:
+                    self.interval = MIN_POLL_INTERVAL
+                else:
+                    self.interval = min(self.interval * POLL_BACKOFF, MAX_POLL_INTERVAL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error following channel {self.channel_id}: {str(e)}")
+                self.interval = MAX_POLL_INTERVAL
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+_followers: Dict[str, ChannelFollower] = {}
+
+def get_follower(channel_id: str) -> ChannelFollower:
+    """Return the process-wide follower of a channel, creating it on first use"""
+    follower = _followers.get(channel_id)
+    if follower is None:
+        follower = _followers[channel_id] = ChannelFollower(channel_id)
+    return follower
@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from scraping.projection import FULL, MESSAGE_FIELDS, Projection
+from scraping.serialization import dumps
+from scraping.snowflake import snowflake_to_epoch_ms
+
+def _pick(source: dict, keys) -> dict:
+    return {key: source[key] for key in keys if source.get(key)}
+
+def trim_embed(embed: dict, projection: Projection = FULL) -> dict:
+    """Keep only the embed fields the projection renders or summarizes"""
+    trimmed = _pick(embed, projection.embed_keys)
+    if projection.embed_fields and embed.get('fields'):
+        trimmed['fields'] = [
+            {'name': field.get('name', ''), 'value': field.get('value', '')}
+            for field in embed['fields']
+        ]
+    if projection.embed_image_keys and embed.get('thumbnail'):
+        trimmed['thumbnail'] = _pick(embed['thumbnail'], projection.embed_image_keys)
+    if projection.embed_author_keys and embed.get('author'):
+        trimmed['author'] = _pick(embed['author'], projection.embed_author_keys)
+    return trimmed
+
+def embed_text_fields(embeds: List[dict]) -> Iterator[Tuple[str, str]]:
+    """(label, text) of the embed parts worth reading: titles, descriptions
+    and field values, leaving out the Source field"""
+    for embed in embeds:
+        if embed.get('title'):
+            yield 'Title', embed['title']
+        if embed.get('description'):
+            yield 'Description', embed['description']
+        for field in embed.get('fields', []):
+            if field['name'].lower() != 'source':
+                yield field['name'], field['value']
+
+class Message:
+    """Compact Discord message holding only the fields we use.
+
+    The creation time comes from the snowflake ID as integer milliseconds,
+    so no timestamp string is ever parsed; `datetime` is built on first use
+    and cached. `to_dict` gives back a trimmed Discord-shaped dict for JSON,
+    and `to_json` its encoded bytes, serialized once and then shared by SSE
+    frames, exports and caches. Both only carry the fields of the
+    projection the message was built with.
+    """
+
+    __slots__ = (
+        'id', 'epoch_ms', 'author_id', 'author_tag', 'content',
+        'embeds', 'attachments', 'edited_timestamp', 'projection', '_datetime', '_json',
+    )
+
+    def __init__(self, id: int, author_id: str, author_tag: str, content: str = '',
+                 embeds: Optional[List[dict]] = None, attachments: Optional[List[dict]] = None,
+                 edited_timestamp: Optional[str] = None, projection: Projection = FULL):
+        self.id = id
+        self.epoch_ms = snowflake_to_epoch_ms(id)
+        self.author_id = author_id
+        self.author_tag = author_tag
+        self.content = content
+        self.embeds = embeds or []
+        self.attachments = attachments or []
+        self.edited_timestamp = edited_timestamp
+        self.projection = projection
+        self._datetime: Optional[datetime] = None
+        self._json: Optional[bytes] = None
+
+    @classmethod
+    def from_discord(cls, raw: dict, projection: Projection = FULL) -> "Message":
+        """Build a message from a Discord API (or to_dict) payload, keeping
+        only what the projection reads"""
+        fields = projection.fields
+        author = (raw.get('author') or {}) if 'author' in fields else None
+        return cls(
+            int(raw['id']),
+            author.get('id', '') if author is not None else '',
+            f"{author.get('username', '')}#{author.get('discriminator', '')}" if author is not None else '',
+            (raw.get('content') or '') if 'content' in fields else '',
+            [trim_embed(embed, projection) for embed in raw.get('embeds') or ()] if 'embeds' in fields else [],
+            [_pick(attachment, projection.attachment_keys) for attachment in raw.get('attachments') or ()]
+            if 'attachments' in fields else [],
+            raw.get('edited_timestamp') if 'edited_timestamp' in fields else None,
+            projection,
+        )
+
+    @property
+    def datetime(self) -> datetime:
+        """UTC creation time"""
+        if self._datetime is None:
+            self._datetime = datetime.fromtimestamp(self.epoch_ms / 1000, tz=timezone.utc)
+        return self._datetime
+
+    @property
+    def timestamp(self) -> str:
+        """Creation time in Discord's ISO 8601 format"""
+        return self.datetime.isoformat(timespec='microseconds')
+
+    def to_dict(self) -> dict:
+        username, _, discriminator = self.author_tag.rpartition('#')
+        data = {
+            'id': str(self.id),
+            'timestamp': self.timestamp,
+            'edited_timestamp': self.edited_timestamp,
+            'author': {'id': self.author_id, 'username': username, 'discriminator': discriminator},
+            'content': self.content,
+            'embeds': self.embeds,
+            'attachments': self.attachments,
+        }
+        if self.projection.fields != MESSAGE_FIELDS:
+            data = {key: value for key, value in data.items() if key == 'id' or key in self.projection.fields}
+        return data
+
+    def to_json(self) -> bytes:
+        """to_dict as compact UTF-8 JSON, encoded on first use"""
+        if self._json is None:
+            self._json = dumps(self.to_dict())
+        return self._json
+
+    def __repr__(self):
+        return f"Message(id={self.id}, author={self.author_tag!r})"
+
+def messages_from_discord(page: List[dict], projection: Projection = FULL) -> List[Message]:
+    return [Message.from_discord(raw, projection) for raw in page]
@@ -0,0 +1,76 @@
+from typing import Iterable
+
+# Top-level message fields besides the ID, as Message.to_dict names them
+MESSAGE_FIELDS = ('timestamp', 'edited_timestamp', 'author', 'content', 'embeds', 'attachments')
+
+# Parts of an embed and attachment any consumer reads
+EMBED_KEYS = ('title', 'description', 'url')
+EMBED_IMAGE_KEYS = ('url', 'proxy_url')
+EMBED_AUTHOR_KEYS = ('name', 'icon_url', 'proxy_icon_url')
+ATTACHMENT_KEYS = ('url', 'proxy_url', 'filename', 'content_type')
+
+class Projection:
+    """The parts of a Discord message one consumer reads.
+
+    Given to Message.from_discord, everything else is dropped right after
+    decode, so neither the message nor the JSON it encodes to carries
+    fields the consumer never looks at.
+    """
+
+    __slots__ = ('name', 'fields', 'embed_keys', 'embed_fields', 'embed_image_keys',
+                 'embed_author_keys', 'attachment_keys')
+
+    def __init__(self, name: str, fields: Iterable[str] = MESSAGE_FIELDS,
+                 embed_keys: Iterable[str] = EMBED_KEYS, embed_fields: bool = True,
+                 embed_image_keys: Iterable[str] = EMBED_IMAGE_KEYS,
+                 embed_author_keys: Iterable[str] = EMBED_AUTHOR_KEYS,
+                 attachment_keys: Iterable[str] = ATTACHMENT_KEYS):
+        fields = set(fields)
+        unknown = fields.difference(MESSAGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown message fields: {', '.join(sorted(unknown))}")
+        self.name = name
+        self.fields = tuple(field for field in MESSAGE_FIELDS if field in fields)
+        self.embed_keys = tuple(embed_keys)
+        self.embed_fields = embed_fields
+        self.embed_image_keys = tuple(embed_image_keys)
+        self.embed_author_keys = tuple(embed_author_keys)
+        self.attachment_keys = tuple(attachment_keys)
+
+    def __repr__(self):
+        return f"Projection({self.name!r})"
+
+# Everything any consumer reads: exports, the archive and the CLI scripts
+FULL = Projection('full')
+
+# What the browser renders (frontend/app/page.tsx); the poster and the embed
+# links are never shown. The edit time comes back with messages posted to
+# /api/summarize, where it is part of the summary cache key
+FRONTEND = Projection(
+    'frontend',
+    fields=('timestamp', 'edited_timestamp', 'content', 'embeds', 'attachments'),
+    embed_keys=('title', 'description'),
+    embed_author_keys=('icon_url', 'proxy_icon_url'),
+    attachment_keys=('url', 'filename', 'content_type'),
+)
+
+# What an HTML report fragment is rendered from; the edit time only serves to
+# invalidate cached fragments
+REPORT = Projection(
+    'report',
+    fields=('edited_timestamp', 'content', 'embeds', 'attachments'),
+    embed_keys=('title', 'description'),
+    embed_author_keys=('icon_url', 'proxy_icon_url'),
+    attachment_keys=('url', 'filename', 'content_type'),
+)
+
+# The text summaries are written from, and the edit time the summary cache
+# key includes
+SUMMARY = Projection(
+    'summary',
+    fields=('timestamp', 'edited_timestamp', 'content', 'embeds'),
+    embed_keys=('title', 'description'),
+    embed_image_keys=(),
+    embed_author_keys=(),
+    attachment_keys=(),
+)
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+# Discord allows 50 requests per second per token across all routes
+GLOBAL_LIMIT = 50
+GLOBAL_PERIOD = 1.0
+
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Routes under these resources are rate limited per resource ID
+MAJOR_PARAMETERS = {'channels', 'guilds', 'webhooks'}
+
+class _Bucket:
+    __slots__ = ('limit', 'remaining', 'reset_at', 'period')
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.period = 0.0
+
+class RateLimitScheduler:
+    """Shared scheduler for Discord requests.
+
+    Routes are mapped to the buckets Discord reports in `X-RateLimit-Bucket`,
+    kept separately per major parameter (channel or guild ID) as Discord does.
+    Before each request the scheduler reserves a slot in the route's bucket
+    and in the global limit, delaying the request when either is exhausted
+    instead of letting Discord answer with 429. Works from both threads and
+    coroutines.
+    """
+
+    def __init__(self, global_limit: int = GLOBAL_LIMIT, global_period: float = GLOBAL_PERIOD):
+        self.global_limit = global_limit
+        self.global_period = global_period
+        self._lock = threading.Lock()
+        self._route_buckets: Dict[str, str] = {}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._recent = deque()
+        self._global_reset_at = 0.0
+        self.requests = 0
+        self.delayed = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    @staticmethod
+    def _major(route: str) -> str:
+        parts = route.strip('/').split('/')
+        if len(parts) > 1 and parts[0] in MAJOR_PARAMETERS:
+            return f'{parts[0]}/{parts[1]}'
+        return ''
+
+    def _bucket(self, route: str) -> _Bucket:
+        bucket_hash = self._route_buckets.get(route)
+        key = f'{bucket_hash}:{self._major(route)}' if bucket_hash else route
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        return bucket
+
+    def _reserve(self, route: str) -> float:
+        """Take a request slot for `route`, or return how long to wait first"""
+        now = time.monotonic()
+        with self._lock:
+            if self._global_reset_at > now:
+                return self._global_reset_at - now
+
+            while self._recent and self._recent[0] <= now - self.global_period:
+                self._recent.popleft()
+            if len(self._recent) >= self.global_limit:
+                return self._recent[0] + self.global_period - now
+
+            bucket = self._bucket(route)
+            if bucket.reset_at <= now:
+                # New window: assume it is as large as the last one Discord reported
+                bucket.remaining = bucket.limit
+                bucket.reset_at = now + bucket.period
+            if bucket.remaining is not None:
+                if bucket.remaining <= 0:
+                    return bucket.reset_at - now
+                bucket.remaining -= 1
+
+            self._recent.append(now)
+            self.requests += 1
+            return 0.0
+
+    def record_wait(self, delay: float):
+        """Count time a request spent waiting before being sent"""
+        with self._lock:
+            self.delayed += 1
+            self.wait_seconds += delay
+
+    async def acquire(self, route: str):
+        """Wait until a request on `route` can be sent without being throttled"""
+        while True:
+            delay = self._reserve(route)
+            if delay <= 0:
+                return
+            self.record_wait(delay)
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, route: str):
+        """Blocking variant of `acquire` for scripts"""
+        while True:
+            delay = self._reserve(route)
+            if delay <= 0:
+                return
+            self.record_wait(delay)
+            time.sleep(delay)
+
+    def update(self, route: str, status: int, headers: Mapping[str, str], body=None) -> Optional[float]:
+        """Record the rate limit headers of a response.
+
+        Returns the number of seconds to wait before retrying, or None when
+        the response should not be retried.
+        """
+        now = time.monotonic()
+        retry_after = None
+
+        with self._lock:
+            bucket_hash = headers.get('x-ratelimit-bucket')
+            if bucket_hash:
+                self._route_buckets[route] = bucket_hash
+
+            bucket = self._bucket(route)
+            limit = headers.get('x-ratelimit-limit')
+            remaining = headers.get('x-ratelimit-remaining')
+            reset_after = headers.get('x-ratelimit-reset-after')
+            if limit is not None:
+                bucket.limit = int(limit)
+            if remaining is not None and reset_after is not None:
+                bucket.period = max(bucket.period, float(reset_after))
+                reset_at = now + float(reset_after)
+                if bucket.remaining is not None and abs(reset_at - bucket.reset_at) < 0.5:
+                    # Same window: requests still in flight already hold slots
+                    bucket.remaining = min(bucket.remaining, int(remaining))
+                else:
+                    bucket.remaining = int(remaining)
+                bucket.reset_at = reset_at
+
+            if status == 429:
+                self.rate_limited += 1
+                retry_after = float(
+                    (body or {}).get('retry_after')
+                    or headers.get('retry-after')
+                    or reset_after
+                    or 1
+                )
+                is_global = (body or {}).get('global') or headers.get('x-ratelimit-global')
+                if is_global:
+                    self._global_reset_at = now + retry_after
+                else:
+                    bucket.remaining = 0
+                    bucket.reset_at = now + retry_after
+            elif status in RETRY_STATUSES:
+                retry_after = 0.0
+
+            if retry_after is not None:
+                self.retries += 1
+
+        return retry_after
+
+    def stats(self) -> dict:
+        """Counters for requests sent and time spent waiting on rate limits"""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'delayed': self.delayed,
+                'rate_limited': self.rate_limited,
+                'retries': self.retries,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'buckets': len(self._buckets),
+            }
+
+def backoff_delay(attempt: int, retry_after: float) -> float:
+    """Delay before retry `attempt` (0-based): retry_after, else exponential"""
+    return retry_after if retry_after > 0 else min(0.5 * 2 ** attempt, 8.0)
+
+# Process-wide scheduler shared by every Discord call
+scheduler = RateLimitScheduler()
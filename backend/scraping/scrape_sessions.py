@@ -0,0 +1,58 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_SESSIONS = 1024
+
+class ScrapeSession:
+    """Handle on a scrape whose messages stay in the message store.
+
+    Covers the channel's messages in (after_id, through_id]; through_id is
+    None while the scrape is still running, meaning "everything after".
+    """
+
+    __slots__ = ('id', 'channel_id', 'after_id', 'through_id', 'created_at')
+
+    def __init__(self, session_id: str, channel_id: str, after_id: int):
+        self.id = session_id
+        self.channel_id = channel_id
+        self.after_id = after_id
+        self.through_id: Optional[int] = None
+        self.created_at = time.time()
+
+class ScrapeSessionRegistry:
+    """In-memory scrape sessions, dropped after `ttl` seconds or when full"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ScrapeSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, channel_id: str, after_id: int) -> ScrapeSession:
+        session = ScrapeSession(secrets.token_urlsafe(12), channel_id, after_id)
+        with self._lock:
+            self._expire(session.created_at)
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id: str) -> Optional[ScrapeSession]:
+        with self._lock:
+            self._expire(time.time())
+            return self._sessions.get(session_id)
+
+    def _expire(self, now: float):
+        # Sessions are kept in creation order, so expired ones are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.created_at <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+scrape_sessions = ScrapeSessionRegistry(ttl=float(os.getenv("SCRAPE_SESSION_TTL", DEFAULT_TTL)))
@@ -0,0 +1,46 @@
+import json
+from typing import Any, Iterable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library is used without it
+    orjson = None
+
+# Name of the JSON backend in use, reported by /api/stats
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decode JSON straight from response or file bytes (str works too)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes, non-ASCII characters left unescaped"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dumps_str(obj: Any) -> str:
+    """Compact JSON text, for SQLite TEXT columns and other str sinks"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def join_array(encoded: Iterable[bytes]) -> bytes:
+    """A JSON array built from already encoded elements, without re-encoding them"""
+    return b'[' + b','.join(encoded) + b']'
+
+def sse_frame(data: Optional[bytes], event: Optional[str] = None, event_id: Optional[int] = None) -> bytes:
+    """A Server-Sent Events frame carrying already encoded JSON.
+
+    `event_id` is what the browser sends back as Last-Event-ID when it
+    reconnects. Without data only the ID is sent: the browser records it
+    but fires no event.
+    """
+    frame = f"event: {event}\n".encode('ascii') if event else b''
+    if event_id is not None:
+        frame += f"id: {event_id}\n".encode('ascii')
+    if data is not None:
+        frame += b'data: ' + data + b'\n'
+    return frame + b'\n'
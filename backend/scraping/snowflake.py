@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple, Union
+
+# Discord snowflakes store milliseconds since 2015-01-01 in their top 42 bits
+DISCORD_EPOCH = 1420070400000
+TIMESTAMP_SHIFT = 22
+
+Snowflake = Union[int, str]
+
+def snowflake_to_epoch_ms(snowflake: Snowflake) -> int:
+    """Unix time in milliseconds at which a snowflake was created"""
+    return (int(snowflake) >> TIMESTAMP_SHIFT) + DISCORD_EPOCH
+
+def snowflake_to_datetime(snowflake: Snowflake) -> datetime:
+    """UTC creation time of a snowflake"""
+    return datetime.fromtimestamp(snowflake_to_epoch_ms(snowflake) / 1000, tz=timezone.utc)
+
+def datetime_to_snowflake(dt: datetime, high: bool = False) -> int:
+    """Smallest (or with high=True, largest) snowflake created at `dt`.
+
+    Naive datetimes are taken to be UTC.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    epoch_ms = int(dt.timestamp() * 1000) - DISCORD_EPOCH
+    snowflake = max(epoch_ms, 0) << TIMESTAMP_SHIFT
+    if high:
+        snowflake |= (1 << TIMESTAMP_SHIFT) - 1
+    return snowflake
+
+def window_to_snowflake_range(hours: float, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Exclusive (after_id, before_id) bounds for the last `hours` hours.
+
+    Every message created inside the window satisfies after_id < id < before_id.
+    """
+    now = now or datetime.now(timezone.utc)
+    after_id = datetime_to_snowflake(now - timedelta(hours=hours)) - 1
+    before_id = datetime_to_snowflake(now, high=True) + 1
+    return max(after_id, 0), before_id
@@ -0,0 +1,84 @@
+import os
+import zlib
+from typing import AsyncIterator, Optional, Union
+
+try:
+    import brotli
+except ImportError:  # optional, event streams are gzipped without it
+    brotli = None
+
+# Encodings offered for event streams, most preferred first; empty disables compression
+SSE_COMPRESSION = [
+    name.strip() for name in os.getenv("SSE_COMPRESSION", "br,gzip").split(',') if name.strip()
+]
+GZIP_LEVEL = 6
+# Brotli's top qualities are far too slow for data compressed as it is sent
+BROTLI_QUALITY = 5
+
+class GzipCompressor:
+    """gzip stream whose output is flushed after every frame"""
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # A sync flush ends the block on a byte boundary, so the client can
+        # decode the frame now while the window still spans earlier frames
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class BrotliCompressor:
+    """Brotli stream whose output is flushed after every frame"""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+COMPRESSORS = {'gzip': GzipCompressor}
+if brotli is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred stream encoding the client accepts, or None to send it as is"""
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.partition(';')
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    for name in SSE_COMPRESSION:
+        if name in COMPRESSORS and (name in accepted or '*' in accepted):
+            return name
+    return None
+
+async def compress_stream(frames: AsyncIterator[Union[str, bytes]], encoding: str) -> AsyncIterator[bytes]:
+    """Compress an event stream frame by frame.
+
+    Every frame is flushed as soon as it is compressed, so events reach the
+    client as they happen while the compression context carries over
+    between frames; repeated keys and URLs cost little after the first.
+    """
+    compressor = COMPRESSORS[encoding]()
+    try:
+        async for frame in frames:
+            if isinstance(frame, str):
+                frame = frame.encode('utf-8')
+            chunk = compressor.compress(frame)
+            if chunk:
+                yield chunk
+        yield compressor.finish()
+    finally:
+        # Run the generator's own cleanup now rather than when it is collected
+        await frames.aclose()
@@ -0,0 +1,171 @@
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from scraping.models import Message
+from scraping.serialization import dumps_str, loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for the columnar archive
+    pa = None
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'archive')
+# Row groups small enough that time-range filters can skip most of a day
+ROW_GROUP_SIZE = 10000
+
+def _schemas():
+    message_schema = pa.schema([
+        ('id', pa.int64()),
+        ('timestamp', pa.timestamp('ms', tz='UTC')),
+        ('author_id', pa.string()),
+        ('author_tag', pa.string()),
+        ('content', pa.string()),
+        ('edited_timestamp', pa.string()),
+        # The first embed flattened into columns; feed bots post one per message
+        ('embed_title', pa.string()),
+        ('embed_description', pa.string()),
+        ('embed_url', pa.string()),
+        ('embed_author', pa.string()),
+        ('embed_field_names', pa.list_(pa.string())),
+        ('embed_field_values', pa.list_(pa.string())),
+        ('attachment_urls', pa.list_(pa.string())),
+        # Complete embeds and attachments, so messages read back unchanged
+        ('embeds_json', pa.string()),
+        ('attachments_json', pa.string()),
+    ])
+    partition_schema = pa.schema([('channel_id', pa.string()), ('date', pa.string())])
+    return message_schema, partition_schema
+
+def _message_row(msg: Message) -> dict:
+    embed = msg.embeds[0] if msg.embeds else {}
+    fields = embed.get('fields') or []
+    return {
+        'id': msg.id,
+        'timestamp': msg.epoch_ms,
+        'author_id': msg.author_id,
+        'author_tag': msg.author_tag,
+        'content': msg.content,
+        'edited_timestamp': msg.edited_timestamp,
+        'embed_title': embed.get('title'),
+        'embed_description': embed.get('description'),
+        'embed_url': embed.get('url'),
+        'embed_author': (embed.get('author') or {}).get('name'),
+        'embed_field_names': [field['name'] for field in fields],
+        'embed_field_values': [field['value'] for field in fields],
+        'attachment_urls': [attachment['url'] for attachment in msg.attachments if attachment.get('url')],
+        'embeds_json': dumps_str(msg.embeds) if msg.embeds else None,
+        'attachments_json': dumps_str(msg.attachments) if msg.attachments else None,
+    }
+
+class MessageArchive:
+    """Long-term message history as Parquet files, one per channel and day.
+
+    Files live under `channel_id=<id>/date=<YYYY-MM-DD>/` (Hive-style, UTC
+    days) sorted by message ID, so reads prune whole channels and days from
+    the directory names and skip row groups by their time and author
+    statistics instead of parsing everything. Writing a day again merges the
+    new messages into its file; a message seen twice keeps its latest copy.
+    Needs the optional pyarrow package.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        if pa is None:
+            raise RuntimeError("The message archive needs the pyarrow package")
+        self.root = root or os.getenv("MESSAGE_ARCHIVE_PATH", DEFAULT_ARCHIVE_PATH)
+        self.schema, self.partitioning = _schemas()
+
+    def _day_path(self, channel_id: str, date: str) -> str:
+        return os.path.join(self.root, f"channel_id={channel_id}", f"date={date}", "messages.parquet")
+
+    def write_messages(self, channel_id: str, messages: List[Message]) -> int:
+        """Merge messages into their channel's daily files; returns the rows written"""
+        days: Dict[str, List[dict]] = {}
+        for msg in messages:
+            date = datetime.fromtimestamp(msg.epoch_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+            days.setdefault(date, []).append(_message_row(msg))
+
+        for date, rows in days.items():
+            path = self._day_path(channel_id, date)
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+            if os.path.exists(path):
+                existing = pq.read_table(path, schema=self.schema)
+                kept = pc.invert(pc.is_in(existing['id'], value_set=table['id']))
+                table = pa.concat_tables([existing.filter(kept), table])
+            table = table.sort_by('id')
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Dot-prefixed, so a scan running meanwhile never picks it up
+            temp_path = os.path.join(os.path.dirname(path), '.messages.parquet.tmp')
+            pq.write_table(table, temp_path, row_group_size=ROW_GROUP_SIZE, compression='zstd')
+            os.replace(temp_path, path)
+        return len(messages)
+
+    def _filter(self, channel_id: Optional[str], start: Optional[datetime],
+                end: Optional[datetime], author: Optional[str]):
+        conditions = []
+        if channel_id is not None:
+            conditions.append(ds.field('channel_id') == channel_id)
+        if start is not None:
+            # The date partition prunes directories, the timestamp row groups
+            conditions.append(ds.field('date') >= start.astimezone(timezone.utc).strftime('%Y-%m-%d'))
+            conditions.append(ds.field('timestamp') >= pa.scalar(start, type=pa.timestamp('ms', tz='UTC')))
+        if end is not None:
+            conditions.append(ds.field('date') <= end.astimezone(timezone.utc).strftime('%Y-%m-%d'))
+            conditions.append(ds.field('timestamp') < pa.scalar(end, type=pa.timestamp('ms', tz='UTC')))
+        if author is not None:
+            # Same keys as FEED_BOTS: an all-digit user ID or a username#discriminator tag
+            if author.isdigit():
+                conditions.append(ds.field('author_id') == author)
+            else:
+                conditions.append(ds.field('author_tag') == (author if '#' in author else author + '#0'))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def _dataset(self):
+        schema = pa.unify_schemas([self.schema, self.partitioning])
+        return ds.dataset(self.root, schema=schema, format='parquet',
+                          partitioning=ds.partitioning(self.partitioning, flavor='hive'))
+
+    def read(self, channel_id: Optional[str] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, author: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None):
+        """Archived messages in [start, end) as an Arrow table.
+
+        The channel, time range and author are pushed down to the scan, and
+        only the requested columns are decoded.
+        """
+        if not os.path.isdir(self.root):
+            return pa.Table.from_pylist([], schema=self.schema)
+        return self._dataset().to_table(
+            columns=list(columns) if columns else None,
+            filter=self._filter(channel_id, start, end, author),
+        )
+
+    def iter_messages(self, channel_id: Optional[str] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, author: Optional[str] = None) -> Iterator[Message]:
+        """Archived messages as Message objects, oldest first within each day"""
+        if not os.path.isdir(self.root):
+            return
+        scanner = self._dataset().scanner(
+            columns=['id', 'author_id', 'author_tag', 'content', 'edited_timestamp',
+                     'embeds_json', 'attachments_json'],
+            filter=self._filter(channel_id, start, end, author),
+        )
+        for batch in scanner.to_batches():
+            for row in batch.to_pylist():
+                yield Message(
+                    row['id'],
+                    row['author_id'],
+                    row['author_tag'],
+                    row['content'] or '',
+                    loads(row['embeds_json']) if row['embeds_json'] else None,
+                    loads(row['attachments_json']) if row['attachments_json'] else None,
+                    row['edited_timestamp'],
+                )
@@ -0,0 +1,228 @@
+import glob
+import json
+import mmap
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from scraping.serialization import loads
+from scraping.snowflake import datetime_to_snowflake
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'dumps.idx.db')
+DEFAULT_DUMP_PATTERN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'messages_*.*json')
+# data/messages_<channel>_<YYYY-MM-DD_HH-MM-SS>[_to_...].json
+DUMP_NAME = re.compile(r'^messages_(.+?)_\d{4}-\d{2}-\d{2}_')
+# Dump files kept mapped at once
+OPEN_MAPS = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dump_files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    channel TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dump_messages (
+    id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (id, file_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS dump_messages_file ON dump_messages (file_id);
+"""
+
+# Whitespace and separators between the elements of a JSON array
+_SEPARATORS = re.compile(r'[\s,]*')
+
+def dump_channel(path: str) -> Optional[str]:
+    """Channel name encoded in a dump's file name, if it follows the save_json pattern"""
+    match = DUMP_NAME.match(os.path.basename(path))
+    return match.group(1) if match else None
+
+def scan_dump(data: bytes) -> Iterator[Tuple[int, int, int]]:
+    """(message id, byte offset, byte length) of every message in a dump's bytes.
+
+    Handles save_json/JSON-array exports and NDJSON. The bytes are decoded
+    as latin-1, which maps each byte to one character, so the decoder's
+    positions are byte offsets; only the ASCII `id` is read from each object.
+    """
+    text = data.decode('latin-1')
+    decoder = json.JSONDecoder()
+    position = _SEPARATORS.match(text, 0).end()
+    if text.startswith('[', position):
+        position += 1
+
+    while True:
+        position = _SEPARATORS.match(text, position).end()
+        if position >= len(text) or text[position] == ']':
+            return
+        try:
+            message, end = decoder.raw_decode(text, position)
+        except ValueError:
+            # A dump still being written ends in a partial message
+            return
+        yield int(message['id']), position, end - position
+        position = end
+
+class DumpIndex:
+    """Sidecar index of message byte offsets in JSON dump files.
+
+    `update` scans dump files once and records where each message starts and
+    ends; afterwards point lookups and time-range slices read just those
+    bytes from a memory-mapped file instead of parsing whole dumps. Files are
+    rescanned only when their size or modification time changes, and files
+    that disappeared are dropped. Compressed exports cannot be mapped and
+    are skipped.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("DUMP_INDEX_PATH", DEFAULT_INDEX_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._maps: "OrderedDict[str, Tuple[object, mmap.mmap]]" = OrderedDict()
+
+    def close(self):
+        with self._lock:
+            for f, mapped in self._maps.values():
+                mapped.close()
+                f.close()
+            self._maps.clear()
+            self._conn.close()
+
+    def update(self, pattern: str = DEFAULT_DUMP_PATTERN) -> Tuple[int, int]:
+        """Index new or changed dumps matching a glob; returns (files, messages) scanned"""
+        paths = {
+            os.path.abspath(path) for path in glob.glob(pattern)
+            if path.endswith(('.json', '.ndjson'))
+        }
+        with self._lock:
+            known = {
+                path: (file_id, size, mtime)
+                for file_id, path, size, mtime in self._conn.execute(
+                    "SELECT id, path, size, mtime FROM dump_files"
+                )
+            }
+
+        files = messages = 0
+        for path in sorted(paths):
+            stat = os.stat(path)
+            entry = known.get(path)
+            if entry and entry[1] == stat.st_size and entry[2] == stat.st_mtime:
+                continue
+            messages += self._index_file(path, stat, entry[0] if entry else None)
+            files += 1
+
+        # Forget dumps that were deleted
+        for path, (file_id, _, _) in known.items():
+            if not os.path.exists(path):
+                self._drop_file(file_id, path)
+        return files, messages
+
+    def _index_file(self, path: str, stat: os.stat_result, file_id: Optional[int]) -> int:
+        self._unmap(path)
+        with open(path, 'rb') as f:
+            entries = list(scan_dump(f.read()))
+
+        with self._lock, self._conn:
+            if file_id is not None:
+                self._conn.execute("DELETE FROM dump_messages WHERE file_id = ?", (file_id,))
+                self._conn.execute(
+                    "UPDATE dump_files SET size = ?, mtime = ? WHERE id = ?",
+                    (stat.st_size, stat.st_mtime, file_id),
+                )
+            else:
+                file_id = self._conn.execute(
+                    "INSERT INTO dump_files (path, size, mtime, channel) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, dump_channel(path)),
+                ).lastrowid
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dump_messages (id, file_id, offset, length) VALUES (?, ?, ?, ?)",
+                [(message_id, file_id, offset, length) for message_id, offset, length in entries],
+            )
+        return len(entries)
+
+    def _drop_file(self, file_id: int, path: str):
+        self._unmap(path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dump_messages WHERE file_id = ?", (file_id,))
+            self._conn.execute("DELETE FROM dump_files WHERE id = ?", (file_id,))
+
+    def _mapped(self, path: str) -> mmap.mmap:
+        entry = self._maps.get(path)
+        if entry is not None:
+            self._maps.move_to_end(path)
+            return entry[1]
+        f = open(path, 'rb')
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps[path] = (f, mapped)
+        if len(self._maps) > OPEN_MAPS:
+            _, (old_file, old_map) = self._maps.popitem(last=False)
+            old_map.close()
+            old_file.close()
+        return mapped
+
+    def _unmap(self, path: str):
+        with self._lock:
+            entry = self._maps.pop(path, None)
+        if entry is not None:
+            entry[1].close()
+            entry[0].close()
+
+    def _read(self, rows: List[tuple]) -> List[dict]:
+        with self._lock:
+            return [
+                loads(self._mapped(path)[offset:offset + length])
+                for path, offset, length in rows
+            ]
+
+    def get(self, message_id: int) -> Optional[dict]:
+        """A message by ID from whichever dump holds it"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT f.path, m.offset, m.length FROM dump_messages m "
+                "JOIN dump_files f ON f.id = m.file_id WHERE m.id = ? "
+                "ORDER BY m.file_id DESC LIMIT 1",
+                (int(message_id),),
+            ).fetchone()
+        return self._read([row])[0] if row else None
+
+    def slice(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              channel: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """Messages created in [start, end), ascending, each read once even if several dumps hold it"""
+        query = (
+            "SELECT f.path, m.offset, m.length, MAX(m.file_id) FROM dump_messages m "
+            "JOIN dump_files f ON f.id = m.file_id WHERE m.id >= ? AND m.id < ?"
+        )
+        params = [
+            datetime_to_snowflake(start) if start else 0,
+            datetime_to_snowflake(end) if end else (1 << 63) - 1,
+        ]
+        if channel is not None:
+            query += " AND f.channel = ?"
+            params.append(channel)
+        query += " GROUP BY m.id ORDER BY m.id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return self._read([row[:3] for row in rows])
+
+    def stats(self) -> dict:
+        with self._lock:
+            files, messages = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM dump_files), (SELECT COUNT(*) FROM dump_messages)"
+            ).fetchone()
+        return {'files': files, 'messages': messages}
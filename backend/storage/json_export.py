@@ -0,0 +1,152 @@
+import gzip
+import io
+import json
+import os
+from typing import Iterator, List, Optional
+
+from scraping.models import Message
+from scraping.serialization import loads
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for .zst exports
+    zstandard = None
+
+FORMATS = ('json', 'ndjson')
+COMPRESSIONS = ('gzip', 'zstd')
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+def export_path(base: str, fmt: str = 'json', compression: Optional[str] = None) -> str:
+    """File name for an export: base plus format and compression extensions"""
+    return base + '.' + fmt + EXTENSIONS.get(compression, '')
+
+class JsonExportWriter:
+    """Streams messages to a JSON or NDJSON file one page at a time.
+
+    Each page is encoded with compact separators and written as soon as it
+    arrives (as its own gzip member or zstd frame when compressed), so
+    memory stays flat however large the window is. After every page a
+    checkpoint next to the file records the byte offset and last message
+    ID; with resume=True the file is cut back to the last checkpoint and
+    writing continues from there, and `last_id` tells the caller where to
+    pick up scraping. Leaving the `with` block without an error means the
+    export is complete, and the checkpoint is removed.
+    """
+
+    def __init__(self, path: str, fmt: str = 'json', compression: Optional[str] = None,
+                 resume: bool = False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}")
+        if compression == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package")
+
+        self.path = path
+        self.format = fmt
+        self.compression = compression
+        self.checkpoint_path = path + '.checkpoint'
+        self.last_id: Optional[int] = None
+        self.count = 0
+        self._compressor = zstandard.ZstdCompressor() if compression == 'zstd' else None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        offset = self._read_checkpoint() if resume else None
+        if offset is None:
+            self._file = open(path, 'wb')
+        else:
+            self._file = open(path, 'r+b')
+            # Drop a partly written page and any closing bracket
+            self._file.truncate(offset)
+            self._file.seek(offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close()
+        if exc_type is None:
+            self.remove_checkpoint()
+
+    def _read_checkpoint(self) -> Optional[int]:
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (checkpoint.get('format') != self.format or
+                checkpoint.get('compression') != self.compression or
+                not os.path.exists(self.path)):
+            return None
+        self.last_id = checkpoint['last_id']
+        self.count = checkpoint['count']
+        return checkpoint['offset']
+
+    def _write_checkpoint(self):
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': self.format,
+                'compression': self.compression,
+                'offset': self._file.tell(),
+                'last_id': self.last_id,
+                'count': self.count,
+            }, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def _write(self, data: bytes):
+        if self.compression == 'gzip':
+            data = gzip.compress(data)
+        elif self.compression == 'zstd':
+            data = self._compressor.compress(data)
+        self._file.write(data)
+
+    def write_page(self, messages: List[Message]):
+        """Append a page of messages (in ascending ID order)"""
+        if not messages:
+            return
+        encoded = [msg.to_json() for msg in messages]
+        if self.format == 'ndjson':
+            chunk = b'\n'.join(encoded) + b'\n'
+        else:
+            chunk = (b',\n' if self.count else b'[\n') + b',\n'.join(encoded)
+        self._write(chunk)
+        self._file.flush()
+
+        self.count += len(messages)
+        self.last_id = messages[-1].id
+        self._write_checkpoint()
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.format == 'json':
+            self._write(b'\n]\n' if self.count else b'[]\n')
+        self._file.close()
+
+    def remove_checkpoint(self):
+        """Forget the resume point once the export is complete"""
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+def _open_export(path: str):
+    if path.endswith(EXTENSIONS['gzip']):
+        return gzip.open(path, 'rb')
+    if path.endswith(EXTENSIONS['zstd']):
+        if zstandard is None:
+            raise RuntimeError("Reading .zst exports needs the zstandard package")
+        # Buffered so NDJSON can be read line by line
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return open(path, 'rb')
+
+def iter_export(path: str) -> Iterator[dict]:
+    """Message dicts of an export or legacy save_json dump, compressed or not"""
+    with _open_export(path) as f:
+        if '.ndjson' in os.path.basename(path):
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+        else:
+            yield from loads(f.read())
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Set, Tuple
+
+from scraping.serialization import dumps_str, loads
+from scraping.snowflake import datetime_to_snowflake
+from storage.search_index import ensure_index, index_messages, search_messages, unindex_messages
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'messages.db')
+PAGE_SIZE = 100
+# Messages younger than this may still be edited or deleted, so they are
+# fetched again even when already synced; a few minutes keep that to about
+# one request, so a repeated scrape still comes almost all from the store
+DEFAULT_REVALIDATE_WINDOW = 10 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    channel_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (channel_id, id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    channel_id TEXT PRIMARY KEY,
+    low_id INTEGER NOT NULL,
+    high_id INTEGER NOT NULL
+);
+"""
+
+class MessageStore:
+    """On-disk message store keyed by channel and snowflake ID.
+
+    Each channel records the ID range (low_id, high_id] that has been fully
+    synced from Discord, so a scrape only has to download what lies outside
+    it and can serve the rest locally. The part of that range younger than
+    `revalidate_window` seconds is downloaded again, so recent edits and
+    deletions still show up.
+    """
+
+    def __init__(self, path: Optional[str] = None, revalidate_window: Optional[float] = None):
+        self.path = path or os.getenv("MESSAGE_STORE_PATH", DEFAULT_STORE_PATH)
+        if revalidate_window is None:
+            revalidate_window = float(os.getenv("MESSAGE_REVALIDATE_WINDOW", DEFAULT_REVALIDATE_WINDOW))
+        self.revalidate_window = timedelta(seconds=revalidate_window)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        ensure_index(self._conn)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def coverage(self, channel_id: str) -> Optional[Tuple[int, int]]:
+        """The synced (low_id, high_id] range of a channel, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT low_id, high_id FROM sync_state WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def plan_sync(self, channel_id: str, after_id: int) -> List[Tuple[str, int, Optional[int]]]:
+        """Steps that read every message after `after_id`, in ascending order.
+
+        Each step is ('fetch', after, before) for a range to download from
+        Discord (before=None meaning up to now), or ('local', after, through)
+        for the range (after, through] already held in the store. Synced
+        messages inside the revalidation window are fetched again.
+        """
+        synced = self.coverage(channel_id)
+        if synced is None:
+            return [('fetch', after_id, None)]
+
+        low_id = synced[0]
+        high_id = min(synced[1], datetime_to_snowflake(datetime.now(timezone.utc) - self.revalidate_window))
+        if high_id <= max(low_id, after_id):
+            # Nothing stored is both requested and settled: the part below
+            # low_id and the tail to revalidate meet, so they are one download
+            return [('fetch', after_id, None)]
+        if after_id >= low_id:
+            return [('local', after_id, high_id), ('fetch', high_id, None)]
+        return [('fetch', after_id, low_id + 1), ('local', low_id, high_id), ('fetch', high_id, None)]
+
+    def save_messages(self, channel_id: str, messages: List[dict]):
+        """Insert or update raw Discord messages, keeping the search index in step"""
+        rows = [
+            (channel_id, int(msg['id']), dumps_str(msg))
+            for msg in messages
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (channel_id, id, payload) VALUES (?, ?, ?)", rows
+            )
+            index_messages(self._conn, channel_id, messages)
+
+    def prune_deleted(self, channel_id: str, after_id: int, through_id: int, seen_ids: Set[int]) -> int:
+        """Drop stored messages in (after_id, through_id] missing from a complete
+        download of that range, i.e. deleted on Discord; returns how many"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id FROM messages WHERE channel_id = ? AND id > ? AND id <= ?",
+                (channel_id, after_id, through_id),
+            ).fetchall()
+            deleted = [message_id for message_id, in rows if message_id not in seen_ids]
+            self._conn.executemany(
+                "DELETE FROM messages WHERE channel_id = ? AND id = ?",
+                [(channel_id, message_id) for message_id in deleted],
+            )
+            unindex_messages(self._conn, deleted)
+        return len(deleted)
+
+    def mark_synced(self, channel_id: str, after_id: int, through_id: int):
+        """Record that every message in (after_id, through_id] is stored"""
+        synced = self.coverage(channel_id)
+        if synced and after_id <= synced[1] and through_id >= synced[0]:
+            # Overlapping or adjacent: extend the existing range
+            after_id, through_id = min(after_id, synced[0]), max(through_id, synced[1])
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (channel_id, low_id, high_id) VALUES (?, ?, ?)",
+                (channel_id, after_id, through_id),
+            )
+
+    def iter_pages(self, channel_id: str, after_id: int, through_id: Optional[int] = None,
+                   page_size: int = PAGE_SIZE) -> Iterator[List[dict]]:
+        """Yield stored messages in (after_id, through_id], ascending, in pages"""
+        cursor = after_id
+        while True:
+            query = "SELECT id, payload FROM messages WHERE channel_id = ? AND id > ?"
+            params = [channel_id, cursor]
+            if through_id is not None:
+                query += " AND id <= ?"
+                params.append(through_id)
+            query += " ORDER BY id LIMIT ?"
+            params.append(page_size)
+
+            with self._lock:
+                rows = self._conn.execute(query, params).fetchall()
+            if not rows:
+                return
+            yield [loads(payload) for _, payload in rows]
+            if len(rows) < page_size:
+                return
+            cursor = rows[-1][0]
+
+    def get_messages(self, channel_id: str, after_id: int, through_id: Optional[int] = None) -> List[dict]:
+        """All stored messages in (after_id, through_id], ascending"""
+        messages = []
+        for page in self.iter_pages(channel_id, after_id, through_id):
+            messages.extend(page)
+        return messages
+
+    def search(self, text: str, channel_id: Optional[str] = None, after_id: Optional[int] = None,
+               before_id: Optional[int] = None, limit: int = 50,
+               order: str = 'newest') -> List[Tuple[str, dict, str]]:
+        """Full-text search over stored messages: (channel_id, message, snippet)"""
+        with self._lock:
+            rows = search_messages(self._conn, text, channel_id, after_id, before_id, limit, order)
+        return [(channel, loads(payload), snippet) for channel, payload, snippet in rows]
+
+_store: Optional[MessageStore] = None
+
+def get_store() -> MessageStore:
+    """Return the process-wide message store, opening it on first use"""
+    global _store
+    if _store is None:
+        _store = MessageStore()
+    return _store
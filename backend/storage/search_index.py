@@ -0,0 +1,108 @@
+import re
+import sqlite3
+from typing import List, Optional, Tuple
+
+from scraping.models import Message, embed_text_fields
+from scraping.serialization import loads
+
+# Full-text index kept next to the messages it covers; rowid is the message ID
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5(
+    content,
+    embeds,
+    channel_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+BACKFILL_BATCH = 5000
+
+_TERM = re.compile(r'"[^"]+"|\S+')
+
+def search_fields(raw: dict) -> Tuple[str, str]:
+    """Indexed text of a raw message: its content, and the embed text the summaries read"""
+    msg = Message.from_discord(raw)
+    return msg.content, '\n'.join(text for _, text in embed_text_fields(msg.embeds))
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches every term.
+
+    Terms are quoted so punctuation never trips the query syntax; "quoted
+    phrases" stay phrases and a trailing * keeps prefix matching.
+    """
+    terms = []
+    for term in _TERM.findall(text):
+        prefix = term.endswith('*') and not term.startswith('"')
+        term = term.strip('"').rstrip('*').replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+def index_messages(conn: sqlite3.Connection, channel_id: str, messages: List[dict]):
+    """Add or replace messages in the index; call inside the store's transaction"""
+    ids = [(int(msg['id']),) for msg in messages]
+    conn.executemany("DELETE FROM message_search WHERE rowid = ?", ids)
+    conn.executemany(
+        "INSERT INTO message_search (rowid, content, embeds, channel_id) VALUES (?, ?, ?, ?)",
+        [(int(msg['id']), *search_fields(msg), channel_id) for msg in messages],
+    )
+
+def unindex_messages(conn: sqlite3.Connection, ids: List[int]):
+    """Drop messages from the index; call inside the store's transaction"""
+    conn.executemany("DELETE FROM message_search WHERE rowid = ?", [(message_id,) for message_id in ids])
+
+def ensure_index(conn: sqlite3.Connection):
+    """Create the index, filling it from already stored messages the first time"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_search'"
+    ).fetchone()
+    conn.executescript(SCHEMA)
+    if exists:
+        return
+
+    cursor = conn.execute("SELECT channel_id, payload FROM messages")
+    while True:
+        rows = cursor.fetchmany(BACKFILL_BATCH)
+        if not rows:
+            break
+        entries = []
+        for channel_id, payload in rows:
+            msg = loads(payload)
+            entries.append((int(msg['id']), *search_fields(msg), channel_id))
+        with conn:
+            conn.executemany(
+                "INSERT INTO message_search (rowid, content, embeds, channel_id) VALUES (?, ?, ?, ?)",
+                entries,
+            )
+
+def search_messages(conn: sqlite3.Connection, text: str, channel_id: Optional[str] = None,
+                    after_id: Optional[int] = None, before_id: Optional[int] = None,
+                    limit: int = 50, order: str = 'newest') -> List[Tuple[str, str, str]]:
+    """(channel_id, payload, highlighted snippet) of matching messages.
+
+    The ID bounds are exclusive and come from the snowflake helpers, so time
+    filters are rowid ranges the index resolves directly; `order` is
+    'newest' or 'relevance' (bm25).
+    """
+    query = fts_query(text)
+    if not query:
+        return []
+
+    sql = (
+        "SELECT s.channel_id, m.payload, snippet(message_search, -1, '[', ']', '…', 12) "
+        "FROM message_search s JOIN messages m ON m.channel_id = s.channel_id AND m.id = s.rowid "
+        "WHERE message_search MATCH ?"
+    )
+    params: list = [query]
+    if channel_id is not None:
+        sql += " AND s.channel_id = ?"
+        params.append(channel_id)
+    if after_id is not None:
+        sql += " AND s.rowid > ?"
+        params.append(after_id)
+    if before_id is not None:
+        sql += " AND s.rowid < ?"
+        params.append(before_id)
+    sql += " ORDER BY rank" if order == 'relevance' else " ORDER BY s.rowid DESC"
+    sql += " LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
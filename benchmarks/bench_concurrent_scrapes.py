@@ -0,0 +1,76 @@
+"""Load benchmark: N concurrent /api/scrape streams against a fake Discord.
+
+Runs `event_generator` for one channel, then for N channels at once, and
+measures event loop lag while they run. With a non-blocking client the N
+streams finish in about the time of one, and the loop never stalls for a
+full Discord round trip.
+
+    python benchmarks/bench_concurrent_scrapes.py --streams 20 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+async def consume(event_generator, channel_id, hours):
+    frames = 0
+    async for _ in event_generator(channel_id, hours):
+        frames += 1
+    return frames
+
+async def measure_lag(stop):
+    """Largest delay between a 10ms sleep and its wake-up"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+async def run(event_generator, channel_ids, hours):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(consume(event_generator, cid, hours) for cid in channel_ids))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await lag_task
+
+async def main(args, channel_ids):
+    import main as backend_main
+    from scraping.async_client import close_client
+
+    single, single_lag = await run(backend_main.event_generator, channel_ids[:1], args.hours)
+    many, many_lag = await run(backend_main.event_generator, channel_ids, args.hours)
+    await close_client()
+
+    print(f"1 stream:   {single:.2f}s (max loop lag {single_lag * 1000:.1f}ms)")
+    print(f"{len(channel_ids)} streams: {many:.2f}s (max loop lag {many_lag * 1000:.1f}ms)")
+    print(f"Serial estimate: {single * len(channel_ids):.2f}s, speedup {single * len(channel_ids) / many:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--streams', type=int, default=20)
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--latency', type=float, default=0.05, help="Fake Discord latency per request (s)")
+    args = parser.parse_args()
+
+    fake = FakeDiscord(channels=args.streams, hours=args.hours + 1, latency=args.latency)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    # Keep the fake channels out of the real store, and every run starting cold
+    os.environ['MESSAGE_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'scrapes.db')
+    os.environ.setdefault('ANTHROPIC_API_KEY', 'benchmark')
+    channel_ids = [channel['id'] for channel in fake.channels]
+
+    try:
+        asyncio.run(main(args, channel_ids))
+    finally:
+        print(f"Fake Discord served {fake.request_count} requests")
+        fake.stop()
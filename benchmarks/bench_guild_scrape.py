@@ -0,0 +1,62 @@
+"""Guild-wide sweep: all channels at once versus one after another.
+
+    python benchmarks/bench_guild_scrape.py --channels 30 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+async def main(args, fake):
+    from scraping.async_client import close_client, iter_window_pages
+    from scraping.guild_scraper import scrape_guild
+    from scraping.rate_limiter import GLOBAL_LIMIT
+    from scraping.snowflake import window_to_snowflake_range
+    from storage.message_store import MessageStore
+
+    after_id, _ = window_to_snowflake_range(args.hours)
+    durations = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MessageStore(os.path.join(tmp, 'serial.db'))
+        for channel in fake.channels:
+            start = time.perf_counter()
+            async for _ in iter_window_pages(channel['id'], after_id, store=store):
+                pass
+            durations.append(time.perf_counter() - start)
+
+    os.environ['MESSAGE_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'guild.db')
+    requests_before = fake.request_count
+    start = time.perf_counter()
+    done = 0
+    async for event in scrape_guild(fake.guild_id, args.hours, concurrency=args.concurrency):
+        done += event['status'] == 'done'
+    sweep = time.perf_counter() - start
+    await close_client()
+
+    print(f"Serial:  {sum(durations):.2f}s for {len(durations)} channels (slowest {max(durations):.2f}s)")
+    requests = fake.request_count - requests_before
+    print(f"Sweep:   {sweep:.2f}s for {done} channels at concurrency {args.concurrency}")
+    print(f"Floor:   {max(max(durations), requests / GLOBAL_LIMIT):.2f}s "
+          f"(slowest channel, or {requests} requests at {GLOBAL_LIMIT}/s global limit)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=30)
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--concurrency', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(channels=args.channels, hours=args.hours + 1, latency=args.latency)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    try:
+        asyncio.run(main(args, fake))
+    finally:
+        fake.stop()
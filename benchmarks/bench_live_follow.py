@@ -0,0 +1,78 @@
+"""Live follow: N viewers of one channel share a single upstream poller.
+
+Messages are posted to the fake server while viewers follow the channel;
+reports how many Discord requests were made and how long new messages took
+to reach every viewer.
+
+    python benchmarks/bench_live_follow.py --viewers 50 --posts 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+async def main(args, fake):
+    from scraping.async_client import close_client
+    from scraping.live_follower import get_follower
+
+    channel_id = fake.channels[0]['id']
+    follower = get_follower(channel_id)
+    queues = [follower.subscribe() for _ in range(args.viewers)]
+    await asyncio.sleep(0.5)
+
+    requests_before = fake.request_count
+    posted_at = {}
+    delays = []
+
+    async def viewer(queue):
+        received = 0
+        while received < args.posts:
+            for msg in await queue.get():
+                delays.append(time.time() - posted_at[str(msg.id)])
+                received += 1
+
+    async def poster():
+        for _ in range(args.posts):
+            # Only feed bot messages reach viewers; post until one is a bot's
+            while True:
+                msg = fake.post_message(channel_id)
+                if msg['author']['username'] == 'FaytuksBot':
+                    posted_at[msg['id']] = time.time()
+                    break
+            await asyncio.sleep(args.post_interval)
+
+    start = time.perf_counter()
+    await asyncio.gather(poster(), *(viewer(queue) for queue in queues))
+    elapsed = time.perf_counter() - start
+    for queue in queues:
+        follower.unsubscribe(queue)
+    await close_client()
+
+    delays.sort()
+    print(f"Viewers:   {args.viewers}, {args.posts} feed messages over {elapsed:.1f}s")
+    print(f"Upstream:  {fake.request_count - requests_before} Discord requests")
+    print(f"Delivery:  median {delays[len(delays) // 2]:.2f}s, max {delays[-1]:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--viewers', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=20)
+    parser.add_argument('--post-interval', type=float, default=0.5)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(channels=1, hours=1, latency=args.latency)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    os.environ['MESSAGE_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'follow.db')
+    os.environ.setdefault('FOLLOW_MIN_INTERVAL', '0.5')
+    try:
+        asyncio.run(main(args, fake))
+    finally:
+        fake.stop()
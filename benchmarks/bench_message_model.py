@@ -0,0 +1,80 @@
+"""Memory and throughput of the compact Message model against raw Discord dicts.
+
+Builds a corpus of real-shaped messages, decodes it from JSON as the pager
+does, and compares holding it as raw dicts with holding Message objects, and
+the time-window work every layer does (filter by cutoff, oldest/newest).
+
+    python benchmarks/bench_message_model.py --messages 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import make_message
+
+def measure(label, build):
+    """Run build() under tracemalloc, returning (result, bytes held, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {held / 1024 / 1024:8.1f} MiB  {elapsed:6.2f}s")
+    return result
+
+def window_dicts(messages, cutoff):
+    kept = [
+        msg for msg in messages
+        if datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc) >= cutoff
+    ]
+    timestamps = [datetime.fromisoformat(msg['timestamp'].rstrip('Z')) for msg in kept]
+    return len(kept), min(timestamps), max(timestamps)
+
+def window_models(messages, cutoff):
+    cutoff_ms = cutoff.timestamp() * 1000
+    kept = [msg for msg in messages if msg.epoch_ms >= cutoff_ms]
+    timestamps = [msg.epoch_ms for msg in kept]
+    return len(kept), min(timestamps), max(timestamps)
+
+def main(args):
+    from scraping.models import Message
+
+    now_ms = int(time.time() * 1000)
+    interval_ms = args.hours * 3600 * 1000 // args.messages
+    corpus = json.dumps([
+        make_message('900000000000000000', now_ms - i * interval_ms, i)
+        for i in range(args.messages)
+    ])
+    print(f"{args.messages} messages, {len(corpus) / 1024 / 1024:.1f} MiB of JSON\n")
+
+    # Held memory only counts what survives the build: the models keep no
+    # reference to the decoded dicts they were made from
+    models = measure("Message objects", lambda: [Message.from_discord(msg) for msg in json.loads(corpus)])
+    raw = measure("raw dicts", lambda: json.loads(corpus))
+    print()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=args.hours / 2)
+    for label, func, messages in (("window over dicts", window_dicts, raw),
+                                  ("window over Message", window_models, models)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            count = func(messages, cutoff)[0]
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{label:<28} {count} kept  {elapsed * 1000:8.1f} ms  "
+              f"({args.messages / elapsed / 1e6:.2f}M msg/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--hours', type=int, default=72)
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
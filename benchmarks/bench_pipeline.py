@@ -0,0 +1,79 @@
+"""Pipelined paging: fetch the next page while the current one is handled.
+
+Pages a channel window with a consumer that spends --work seconds on each
+page (standing in for storing, filtering and sending it), once fetching
+strictly in turn and once with pages prefetched, for the async and the
+sync pager.
+
+    python benchmarks/bench_pipeline.py --hours 24 --work 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+async def run_async(args, channel_id, after_id):
+    from scraping.async_client import close_client, iter_message_pages, prefetch
+
+    results = {}
+    for label, pipelined in (('in turn', False), ('prefetched', True)):
+        pages = iter_message_pages(channel_id, after_id)
+        if pipelined:
+            pages = prefetch(pages)
+        start = time.perf_counter()
+        count = 0
+        async for page in pages:
+            count += len(page)
+            await asyncio.sleep(args.work)
+        results[label] = (time.perf_counter() - start, count)
+    await close_client()
+    return results
+
+def run_sync(args, channel_id, after_id):
+    from scraping.discord_client import iter_message_pages, prefetch
+
+    results = {}
+    for label, pipelined in (('in turn', False), ('prefetched', True)):
+        pages = iter_message_pages(channel_id, after_id)
+        if pipelined:
+            pages = prefetch(pages)
+        start = time.perf_counter()
+        count = 0
+        for page in pages:
+            count += len(page)
+            time.sleep(args.work)
+        results[label] = (time.perf_counter() - start, count)
+    return results
+
+def main(args, fake):
+    from scraping.snowflake import window_to_snowflake_range
+
+    channel_id = fake.channels[0]['id']
+    after_id, _ = window_to_snowflake_range(args.hours)
+    for pager, results in (('async', asyncio.run(run_async(args, channel_id, after_id))),
+                           ('sync', run_sync(args, channel_id, after_id))):
+        for label, (elapsed, count) in results.items():
+            print(f"{pager:>5} {label:<10} {elapsed:.2f}s for {count} messages")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--work', type=float, default=0.05)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(channels=1, hours=args.hours + 1, latency=args.latency)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    # Keep the fake channels out of the real store, and every run starting cold
+    os.environ['MESSAGE_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'pipeline.db')
+    try:
+        main(args, fake)
+    finally:
+        fake.stop()
@@ -0,0 +1,55 @@
+"""Memory and SSE bytes of messages trimmed per consumer.
+
+Decodes a corpus of real-shaped messages and builds Message objects under
+each projection (full, frontend, report, summary), reporting the memory
+they hold and the size of the JSON they encode to, next to the raw
+Discord dicts.
+
+    python benchmarks/bench_projection.py --messages 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import make_message
+
+def measure(label, build, encode):
+    """Build under tracemalloc and print held memory, build time and encoded size"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = encode(result)
+    print(f"{label:<12} {held / 1024 / 1024:8.1f} MiB held  {elapsed:6.2f}s  {size / 1024 / 1024:8.1f} MiB JSON")
+
+def main(args):
+    from scraping.models import Message
+    from scraping.projection import FRONTEND, FULL, REPORT, SUMMARY
+    from scraping.serialization import dumps, loads
+
+    now_ms = int(time.time() * 1000)
+    corpus = json.dumps([
+        make_message('900000000000000000', now_ms - i * 1000, i)
+        for i in range(args.messages)
+    ]).encode('utf-8')
+    print(f"{args.messages} messages, {len(corpus) / 1024 / 1024:.1f} MiB of JSON\n")
+
+    measure("raw dicts", lambda: loads(corpus), lambda messages: sum(len(dumps(msg)) for msg in messages))
+    for projection in (FULL, FRONTEND, REPORT, SUMMARY):
+        measure(projection.name,
+                lambda: [Message.from_discord(raw, projection) for raw in loads(corpus)],
+                lambda messages: sum(len(msg.to_json()) for msg in messages))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    main(parser.parse_args())
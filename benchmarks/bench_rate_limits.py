@@ -0,0 +1,71 @@
+"""Scrape through the rate limit scheduler against a throttling fake Discord.
+
+The fake server allows only a few requests per route per second, answers
+429 beyond that and fails a share of requests with 502. Every scrape must
+still return the full window, and the scheduler should mostly delay requests
+ahead of time rather than get throttled.
+
+    python benchmarks/bench_rate_limits.py --channels 5 --limit 3 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+async def scrape_async(channel_ids, hours):
+    from scraping.async_client import close_client, iter_message_pages
+    from scraping.snowflake import window_to_snowflake_range
+
+    async def scrape(channel_id):
+        after_id, _ = window_to_snowflake_range(hours)
+        count = 0
+        async for page in iter_message_pages(channel_id, after_id):
+            count += len(page)
+        return count
+
+    counts = await asyncio.gather(*(scrape(cid) for cid in channel_ids))
+    await close_client()
+    return counts
+
+def main(args):
+    fake = FakeDiscord(channels=args.channels, hours=args.hours + 1, latency=0.01,
+                       rate_limit=(args.limit, 1.0), error_rate=args.error_rate)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    channel_ids = [channel['id'] for channel in fake.channels]
+    expected = args.hours * 60
+
+    from scraping.discord_client import iter_message_pages
+    from scraping.rate_limiter import scheduler
+    from scraping.snowflake import window_to_snowflake_range
+
+    start = time.perf_counter()
+    after_id, _ = window_to_snowflake_range(args.hours)
+    sync_count = sum(len(page) for page in iter_message_pages(channel_ids[0], after_id))
+    print(f"sync:  {sync_count}/{expected} messages in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    counts = asyncio.run(scrape_async(channel_ids, args.hours))
+    print(f"async: {counts} (expected {expected} each) in {time.perf_counter() - start:.2f}s")
+
+    print(f"Scheduler: {scheduler.stats()}")
+    print(f"Fake Discord: {fake.request_count} requests, {fake.rate_limited_count} answered 429, "
+          f"{fake.error_count} answered 502")
+    fake.stop()
+
+    complete = sync_count == expected and all(count == expected for count in counts)
+    print("OK: every window complete" if complete else "FAIL: messages missing")
+    return 0 if complete else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=5)
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--limit', type=int, default=3, help="Requests per route per second")
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""JSON decode and encode on the hot paths, old way against the shared layer.
+
+Builds pages of real-shaped messages and times decoding them as the pagers
+used to (response text through json.loads) against scraping.serialization,
+then encoding them for SSE frames and exports: re-encoding to_dict() lists
+against joining each message's cached to_json(), and the indented export
+against the compact one.
+
+    python benchmarks/bench_serialization.py --messages 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import make_message
+
+PAGE_SIZE = 100
+
+def timed(label, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        size = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<32} {elapsed * 1000:8.1f} ms  {size / 1024 / 1024:6.1f} MiB")
+    return elapsed
+
+def main(args):
+    from scraping.models import Message
+    from scraping.serialization import BACKEND, join_array, loads
+
+    now_ms = int(time.time() * 1000)
+    pages = [
+        json.dumps([
+            make_message('900000000000000000', now_ms - (start + i) * 1000, start + i)
+            for i in range(PAGE_SIZE)
+        ]).encode('utf-8')
+        for start in range(0, args.messages, PAGE_SIZE)
+    ]
+    print(f"{args.messages} messages in {len(pages)} pages, JSON backend: {BACKEND}\n")
+
+    corpus_size = sum(map(len, pages))
+    timed("decode text + json.loads",
+          lambda: [json.loads(page.decode('utf-8')) for page in pages] and corpus_size, args.repeat)
+    timed("decode bytes + loads",
+          lambda: [loads(page) for page in pages] and corpus_size, args.repeat)
+    print()
+
+    frames = [[Message.from_discord(raw) for raw in loads(page)] for page in pages]
+    # Frames are sent to every client and exported; the cache is warm after the first
+    for page in frames:
+        for msg in page:
+            msg.to_json()
+
+    timed("frames: json.dumps(to_dict)",
+          lambda: sum(len(json.dumps([msg.to_dict() for msg in page]).encode('utf-8')) for page in frames),
+          args.repeat)
+    timed("frames: join_array(to_json)",
+          lambda: sum(len(join_array(msg.to_json() for msg in page)) for page in frames),
+          args.repeat)
+    print()
+
+    messages = [msg for page in frames for msg in page]
+    timed("export: indent=2",
+          lambda: len(json.dumps([msg.to_dict() for msg in messages], indent=2, ensure_ascii=False).encode('utf-8')),
+          args.repeat)
+    timed("export: compact lines",
+          lambda: len(b'[\n' + b',\n'.join(msg.to_json() for msg in messages) + b'\n]\n'),
+          args.repeat)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,56 @@
+"""Bytes on the wire for a channel scrape stream, uncompressed and compressed.
+
+Streams /api/scrape from the backend app for each encoding the backend
+can produce, once the window is in the message store so every run serves
+the same pages, and reports the bytes sent, the time taken and how long
+those bytes would need over a --link-kbps connection.
+
+    python benchmarks/bench_sse_compression.py --hours 72 --link-kbps 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from fake_discord import FakeDiscord
+
+def main(args, fake):
+    from fastapi.testclient import TestClient
+
+    import main as backend
+    from scraping.stream_compression import COMPRESSORS
+
+    channel_id = fake.channels[0]['id']
+    url = f"/api/scrape/{channel_id}?hours={args.hours}"
+    with TestClient(backend.app) as client:
+        # Fill the store, so the runs below differ only in encoding
+        client.get(url, headers={'Accept-Encoding': 'identity'})
+
+        for encoding in ['identity', *COMPRESSORS]:
+            start = time.perf_counter()
+            sent = 0
+            with client.stream('GET', url, headers={'Accept-Encoding': encoding}) as response:
+                for chunk in response.iter_raw():
+                    sent += len(chunk)
+            elapsed = time.perf_counter() - start
+            transfer = sent * 8 / 1000 / args.link_kbps
+            print(f"{encoding:<9} {sent / 1024:10.1f} KiB  {elapsed:6.2f}s  "
+                  f"{transfer:7.1f}s at {args.link_kbps} kbit/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=int, default=72)
+    parser.add_argument('--link-kbps', type=int, default=1000)
+    args = parser.parse_args()
+
+    fake = FakeDiscord(channels=1, hours=args.hours + 1)
+    os.environ['DISCORD_API_BASE'] = fake.start()
+    os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+    os.environ['MESSAGE_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'compression.db')
+    try:
+        main(args, fake)
+    finally:
+        fake.stop()
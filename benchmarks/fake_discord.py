@@ -0,0 +1,212 @@
+"""Local stand-in for the parts of the Discord REST API the scraper uses.
+
+Serves `/guilds/{id}/channels` and `/channels/{id}/messages` with synthetic,
+real-shaped messages whose IDs are valid snowflakes, so the backend can be
+pointed at it through DISCORD_API_BASE. Optionally enforces per-route rate
+limits with Discord's `X-RateLimit-*` headers and 429 responses, and injects
+random 5xx errors.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DISCORD_EPOCH = 1420070400000
+
+def make_snowflake(epoch_ms, sequence=0):
+    return ((epoch_ms - DISCORD_EPOCH) << 22) | (sequence & 0xFFF)
+
+def make_message(channel_id, epoch_ms, sequence):
+    """Build a message shaped like the ones FaytuksBot posts"""
+    is_bot = sequence % 3 != 0
+    author = (
+        {'id': '1000000000000007032', 'username': 'FaytuksBot', 'discriminator': '7032', 'bot': True}
+        if is_bot else
+        {'id': str(2000000000000000000 + sequence % 50), 'username': f'user{sequence % 50}', 'discriminator': '0'}
+    )
+    timestamp = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).isoformat()
+    return {
+        'id': str(make_snowflake(epoch_ms, sequence)),
+        'type': 0,
+        'channel_id': channel_id,
+        'author': author,
+        'content': '' if is_bot else f'Chat message {sequence}',
+        'timestamp': timestamp,
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'pinned': False,
+        'flags': 0,
+        'components': [],
+        'attachments': [] if sequence % 7 else [{
+            'id': str(make_snowflake(epoch_ms, sequence + 1)),
+            'filename': f'image{sequence}.jpg',
+            'size': 183245,
+            'url': f'https://cdn.discordapp.com/attachments/{channel_id}/{sequence}/image{sequence}.jpg',
+            'proxy_url': f'https://media.discordapp.net/attachments/{channel_id}/{sequence}/image{sequence}.jpg',
+            'width': 1280,
+            'height': 720,
+            'content_type': 'image/jpeg',
+        }],
+        'embeds': [] if not is_bot else [{
+            'type': 'rich',
+            'title': f'Update {sequence}: Officials confirm new developments in the region',
+            'description': 'Local sources report ongoing activity near the border, with further '
+                           'statements expected from authorities later today. ' * 2,
+            'color': 16711680,
+            'author': {
+                'name': f'source{sequence % 20}',
+                'icon_url': f'https://pbs.twimg.com/profile_images/{sequence % 20}/photo.jpg',
+                'proxy_icon_url': f'https://images-ext-1.discordapp.net/external/{sequence % 20}/photo.jpg',
+            },
+            'thumbnail': {
+                'url': f'https://pbs.twimg.com/media/{sequence}.jpg',
+                'proxy_url': f'https://images-ext-1.discordapp.net/external/{sequence}.jpg',
+                'width': 400,
+                'height': 400,
+            },
+            'fields': [
+                {'name': 'Translated from', 'value': 'Arabic', 'inline': True},
+                {'name': 'Source', 'value': f'https://x.com/source{sequence % 20}/status/{sequence}', 'inline': False},
+            ],
+            'footer': {'text': 'FaytuksBot'},
+        }],
+        'reactions': [{'emoji': {'id': None, 'name': '🔥'}, 'count': sequence % 5 + 1, 'me': False}],
+    }
+
+class FakeDiscord:
+    """Threaded fake Discord server with configurable latency and history"""
+
+    def __init__(self, channels=10, hours=72, interval=60, latency=0.05, guild_id='1',
+                 rate_limit=None, error_rate=0.0):
+        self.latency = latency
+        self.guild_id = guild_id
+        # (requests, seconds) allowed per route, or None for no limit
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.error_count = 0
+        self._windows = {}
+        self._lock = threading.Lock()
+        now_ms = int(time.time() * 1000)
+        self.channels = [
+            {'id': str(900000000000000000 + i), 'name': f'🔴channel-{i}', 'type': 0,
+             'position': i, 'parent_id': None}
+            for i in range(channels)
+        ]
+        # Messages per channel, newest first, like Discord returns them
+        count = int(hours * 3600 / interval)
+        self.messages = {
+            channel['id']: [
+                make_message(channel['id'], now_ms - n * interval * 1000, n)
+                for n in range(count)
+            ]
+            for channel in self.channels
+        }
+        self._server = None
+
+    def post_message(self, channel_id):
+        """Append a new message to a channel as if it was just posted"""
+        with self._lock:
+            history = self.messages[channel_id]
+            sequence = len(history)
+            history.insert(0, make_message(channel_id, int(time.time() * 1000), sequence))
+            return history[0]
+
+    def check_rate_limit(self, path):
+        """Return (allowed, headers) for one request on the route `path`"""
+        if not self.rate_limit:
+            return True, {}
+        limit, period = self.rate_limit
+        now = time.monotonic()
+        with self._lock:
+            start, used = self._windows.get(path, (now, 0))
+            if now - start >= period:
+                start, used = now, 0
+            allowed = used < limit
+            if allowed:
+                used += 1
+            else:
+                self.rate_limited_count += 1
+            self._windows[path] = (start, used)
+        reset_after = max(start + period - now, 0.001)
+        return allowed, {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(limit - used),
+            'X-RateLimit-Reset-After': f'{reset_after:.3f}',
+            'X-RateLimit-Bucket': 'bucket-' + path.strip('/').split('/')[0],
+        }
+
+    def handle(self, path, query):
+        """Return (status, headers, body) for a request"""
+        parts = path.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'guilds' and parts[2] == 'channels':
+            return 200, {}, self.channels
+        if len(parts) == 3 and parts[0] == 'channels' and parts[2] == 'messages':
+            history = self.messages.get(parts[1])
+            if history is None:
+                return 404, {}, {'message': 'Unknown Channel', 'code': 10003}
+            limit = min(int(query.get('limit', ['50'])[0]), 100)
+            if 'after' in query:
+                after = int(query['after'][0])
+                newer = [m for m in history if int(m['id']) > after]
+                return 200, {}, newer[-limit:]
+            if 'before' in query:
+                before = int(query['before'][0])
+                history = [m for m in history if int(m['id']) < before]
+            return 200, {}, history[:limit]
+        return 404, {}, {'message': '404: Not Found', 'code': 0}
+
+    def start(self):
+        """Start serving in a daemon thread and return the API base URL"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.request_count += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlparse(self.path)
+                allowed, headers = fake.check_rate_limit(url.path)
+                if not allowed:
+                    retry_after = float(headers['X-RateLimit-Reset-After'])
+                    status, body = 429, {'message': 'You are being rate limited.',
+                                         'retry_after': retry_after, 'global': False}
+                elif fake.error_rate and random.random() < fake.error_rate:
+                    with fake._lock:
+                        fake.error_count += 1
+                    status, body = 502, {'message': 'Bad Gateway'}
+                else:
+                    status, extra_headers, body = fake.handle(url.path, parse_qs(url.query))
+                    headers.update(extra_headers)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -4,7 +4,7 @@ import ImageModal from '@/components/ImageModal'
 import ResizableSidebar from '@/components/ResizableSidebar'
 import VideoModal from '@/components/VideoModal'
 import { Channel, Summary } from '@/types/discord'
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 
 // Helper function to extract username from URLs
 const extractUsernameFromUrl = (url: string): string | null => {
@@ -83,15 +83,18 @@ export default function Home() {
   const [selectedVideo, setSelectedVideo] = useState<{ src: string; type: string } | null>(null)
   const [summary, setSummary] = useState('')
   const [summarizing, setSummarizing] = useState(false)
+  const [scrapeSessionId, setScrapeSessionId] = useState<string | null>(null)
   const [copySuccess, setCopySuccess] = useState(false);
   const [summaryHistory, setSummaryHistory] = useState<Summary[]>([])
   const [isSidebarOpen, setIsSidebarOpen] = useState(true);
   const [selectedHistorySummary, setSelectedHistorySummary] = useState<Summary | null>(null);
   const [summaryTimeframe, setSummaryTimeframe] = useState<number>(24);
   const [loadTimeframe, setLoadTimeframe] = useState<number>(24);
+  const followSourceRef = useRef<EventSource | null>(null);
 
   useEffect(() => {
     fetchChannels()
+    return () => stopFollowing()
   }, [])
 
   const fetchChannels = async () => {
@@ -104,36 +107,68 @@ export default function Home() {
     }
   }
 
+  const addMessages = (newMessages: any[]) => {
+    setAllMessages(prevMessages => {
+        // Keyed by ID, so a message delivered twice is shown once (the later copy wins)
+        const byId = new Map(prevMessages.map(msg => [msg.id, msg]));
+        newMessages.forEach(msg => byId.set(msg.id, msg));
+        const updatedMessages = Array.from(byId.values()).sort((a, b) => 
+            new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime()
+        );
+        setDisplayedMessages(updatedMessages.slice(0, displayLimit));
+        return updatedMessages;
+    });
+  }
+
+  const stopFollowing = () => {
+    followSourceRef.current?.close();
+    followSourceRef.current = null;
+  }
+
+  // After a scrape, keep the channel open and add new messages as they are posted
+  const startFollowing = (channelId: string, afterId: string) => {
+    stopFollowing();
+    // Continue right after the scrape's last event, so nothing is sent twice
+    const query = afterId ? `?after_id=${afterId}` : '';
+    const followSource = new EventSource(`http://localhost:8000/api/follow/${channelId}${query}`);
+    followSource.onmessage = (event) => addMessages(JSON.parse(event.data));
+    // Away for too long for the backend to catch up: load the window again
+    followSource.addEventListener('reset', () => handleScrape());
+    followSourceRef.current = followSource;
+  }
+
   const handleScrape = async () => {
     if (!selectedChannel) return;
     
+    stopFollowing();
     setLoading(true);
     setAllMessages([]);
     setDisplayedMessages([]);
+    setScrapeSessionId(null);
     
     try {
         const eventSource = new EventSource(`http://localhost:8000/api/scrape/${selectedChannel}?hours=${loadTimeframe}`);
         
-        eventSource.onmessage = (event) => {
-            const newMessages = JSON.parse(event.data);
-            setAllMessages(prevMessages => {
-                const updatedMessages = [...prevMessages, ...newMessages].sort((a, b) => 
-                    new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime()
-                );
-                setDisplayedMessages(updatedMessages.slice(0, displayLimit));
-                return updatedMessages;
-            });
-        };
+        eventSource.onmessage = (event) => addMessages(JSON.parse(event.data));
         
         eventSource.onerror = (error) => {
+            // A dropped connection is retried by the browser, and the backend
+            // resumes after the last event ID it received
+            if (eventSource.readyState === EventSource.CONNECTING) return;
             console.error('EventSource error:', error);
             eventSource.close();
             setLoading(false);
         };
         
-        eventSource.addEventListener('complete', () => {
+        // The backend keeps the scraped messages; summaries refer to them by session
+        eventSource.addEventListener('session', (event) => {
+            setScrapeSessionId(JSON.parse((event as MessageEvent).data).session_id);
+        });
+        
+        eventSource.addEventListener('complete', (event) => {
             eventSource.close();
             setLoading(false);
+            startFollowing(selectedChannel, (event as MessageEvent).lastEventId);
         });
         
     } catch (error) {
@@ -155,28 +190,56 @@ export default function Home() {
     setSummarizing(true);
     
     try {
-        const response = await fetch('http://localhost:8000/api/summarize', {
+        const response = await fetch('http://localhost:8000/api/summarize/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
+            body: JSON.stringify(scrapeSessionId ? {
+                session_id: scrapeSessionId,
+                hours: summaryTimeframe
+            } : {
                 messages: displayedMessages,
                 hours: summaryTimeframe
             }),
         });
         
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error('Failed to generate summary');
         }
         
-        const data = await response.json();
-        setSummary(data.summary);
+        // Read the SSE stream, showing the summary as it is written
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let summaryText = '';
+        setSummary('');
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const frames = buffer.split('\n\n');
+            buffer = frames.pop() || '';
+            for (const frame of frames) {
+                const eventLine = frame.split('\n').find(line => line.startsWith('event: '));
+                const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+                const eventType = eventLine ? eventLine.slice(7) : 'message';
+                if (eventType === 'error') {
+                    throw new Error(dataLine ? JSON.parse(dataLine.slice(6)).error : 'Failed to generate summary');
+                }
+                if (eventType === 'message' && dataLine) {
+                    summaryText += JSON.parse(dataLine.slice(6)).text;
+                    setSummary(summaryText);
+                }
+            }
+        }
 
         // Add to history
         const selectedChannelName = channels.find(c => c.id === selectedChannel)?.name || 'Unknown Channel';
         const newSummary: Summary = {
-            text: data.summary,
+            text: summaryText,
             timestamp: new Date().toISOString(),
             channelName: selectedChannelName
         };
@@ -367,9 +430,11 @@ export default function Home() {
   // Update the channel selection handler
   const handleChannelChange = (e: React.ChangeEvent<HTMLSelectElement>) => {
     setSelectedChannel(e.target.value);
+    stopFollowing();
     // Clear messages and summary when changing channels
     setAllMessages([]);
     setDisplayedMessages([]);
+    setScrapeSessionId(null);
     setSummary('');
   };
 
@@ -472,7 +537,7 @@ export default function Home() {
             )}
           </div>
 
-          {summarizing && (
+          {summarizing && !summary && (
             <div className="mb-8 p-6 rounded-xl bg-gray-800/50 backdrop-blur-sm border border-gray-700/50">
               <div className="flex items-center justify-center">
                 <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-white"></div>
@@ -481,7 +546,7 @@ export default function Home() {
             </div>
           )}
 
-          {summary && !summarizing && (
+          {summary && (
             <div className="mb-8 p-6 rounded-xl bg-gray-800/50 backdrop-blur-sm border border-gray-700/50">
               <div className="flex justify-between items-start mb-4">
                 <h3 className="text-lg font-medium text-gray-200">AI Summary ✨</h3>
@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from colorama import Fore, Style
+
+# Share the channel directory and the message archive with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from scraping.channel_directory import get_directory
+from scraping.models import Message
+from storage.archive import MessageArchive
+from storage.dump_index import dump_channel
+from storage.json_export import iter_export
+
+load_dotenv()
+GUILD_ID = os.getenv("GUILD_ID")
+
+IMPORT_BATCH = 50000
+
+def resolve_channel(directory, name):
+    channel = directory.find(name)
+    if not channel:
+        print(Fore.RED + f"No channel found matching '{name}'" + Style.RESET_ALL)
+    return channel
+
+def import_dumps(archive, paths, channel_name=None):
+    """Add save_json/export dumps to the archive, batching large files"""
+    directory = get_directory(GUILD_ID, persistent=True)
+    directory.ensure_loaded_sync()
+
+    for path in paths:
+        name = channel_name or dump_channel(path)
+        if name is None:
+            print(Fore.RED + f"Cannot tell the channel of {path}; use --channel" + Style.RESET_ALL)
+            continue
+        channel = resolve_channel(directory, name)
+        if not channel:
+            continue
+
+        count = 0
+        batch = []
+        for raw in iter_export(path):
+            batch.append(Message.from_discord(raw))
+            if len(batch) >= IMPORT_BATCH:
+                count += archive.write_messages(channel['id'], batch)
+                batch = []
+        if batch:
+            count += archive.write_messages(channel['id'], batch)
+        print(Fore.GREEN + f"Archived {count} messages from {path} into {channel['name']}" + Style.RESET_ALL)
+
+def scan(archive, channel_name=None, hours=None, since=None, until=None, author=None):
+    """Print how many archived messages match and how long the scan took"""
+    channel_id = None
+    if channel_name:
+        directory = get_directory(GUILD_ID, persistent=True)
+        directory.ensure_loaded_sync()
+        channel = resolve_channel(directory, channel_name)
+        if not channel:
+            return
+        channel_id = channel['id']
+
+    start = datetime.now(timezone.utc) - timedelta(hours=hours) if hours else None
+    if since:
+        start = datetime.strptime(since, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    end = datetime.strptime(until, '%Y-%m-%d').replace(tzinfo=timezone.utc) if until else None
+
+    started = time.perf_counter()
+    table = archive.read(channel_id, start, end, author,
+                         columns=['id', 'timestamp', 'author_tag', 'embed_title'])
+    elapsed = time.perf_counter() - started
+    print(Fore.GREEN + f"{table.num_rows} messages in {elapsed:.2f}s" + Style.RESET_ALL)
+
+    newest = table.sort_by([('id', 'descending')]).slice(0, 5).to_pylist()
+    for row in newest:
+        print(f"{row['timestamp']:%Y-%m-%d %H:%M} {row['author_tag']}: {row['embed_title'] or ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep message history in the columnar archive (data/archive)")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subcommands.add_parser('import', help="Archive JSON/NDJSON dumps")
+    import_parser.add_argument('paths', nargs='+', help="Dump files, e.g. data/messages_*.json")
+    import_parser.add_argument('--channel', help="Channel of the dumps (default: taken from each file name)")
+
+    scan_parser = subcommands.add_parser('scan', help="Count archived messages matching a filter")
+    scan_parser.add_argument('--channel', help="Channel name to search for (default: all)")
+    scan_parser.add_argument('--hours', type=int, help="Only the last N hours")
+    scan_parser.add_argument('--since', help="First UTC day, YYYY-MM-DD")
+    scan_parser.add_argument('--until', help="UTC day to stop before, YYYY-MM-DD")
+    scan_parser.add_argument('--author', help="Author ID or username#discriminator")
+    args = parser.parse_args()
+
+    try:
+        archive = MessageArchive()
+    except RuntimeError as e:
+        print(Fore.RED + str(e) + Style.RESET_ALL)
+        return
+
+    if args.command == 'import':
+        import_dumps(archive, args.paths, args.channel)
+    else:
+        scan(archive, args.channel, args.hours, args.since, args.until, args.author)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from colorama import Fore, Style
+
+# Share the dump index with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from storage.dump_index import DEFAULT_DUMP_PATTERN, DumpIndex
+
+def parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc) if value else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Index data/messages_*.json dumps and read messages from them")
+    parser.add_argument('--pattern', default=DEFAULT_DUMP_PATTERN, help="Glob of the dump files to index")
+    parser.add_argument('--id', help="Print one message by ID")
+    parser.add_argument('--since', help="Print messages from this UTC day on, YYYY-MM-DD")
+    parser.add_argument('--until', help="UTC day to stop before, YYYY-MM-DD")
+    parser.add_argument('--channel', help="Only dumps of this channel (as in the file names)")
+    parser.add_argument('--limit', type=int, default=20, help="Messages to print (default: 20)")
+    args = parser.parse_args()
+
+    index = DumpIndex()
+    started = time.perf_counter()
+    files, messages = index.update(args.pattern)
+    stats = index.stats()
+    print(Fore.GREEN + f"Indexed {messages} messages from {files} new or changed dumps in "
+          f"{time.perf_counter() - started:.2f}s ({stats['messages']} messages in {stats['files']} dumps)"
+          + Style.RESET_ALL)
+
+    if args.id:
+        message = index.get(int(args.id))
+        if message is None:
+            print(Fore.RED + f"Message {args.id} is not in any dump" + Style.RESET_ALL)
+        else:
+            print(json.dumps(message, indent=2, ensure_ascii=False))
+    elif args.since or args.until or args.channel:
+        started = time.perf_counter()
+        found = index.slice(parse_day(args.since), parse_day(args.until), args.channel, args.limit)
+        print(Fore.CYAN + f"{len(found)} messages in {(time.perf_counter() - started) * 1000:.1f}ms" + Style.RESET_ALL)
+        for message in found:
+            titles = [embed.get('title', '') for embed in message.get('embeds') or []]
+            print(f"{message['timestamp']} {message['author']['username']}: {message.get('content') or ' '.join(titles)}")
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Share the message model and snowflake helpers with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from scraping.models import Message
+from scraping.projection import REPORT
+from scraping.snowflake import datetime_to_snowflake
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+# Reports are shown in GMT-3
+LOCAL_TZ = timezone(timedelta(hours=-3))
+# Output is written in blocks of this size, never as one document string
+WRITE_BUFFER = 1 << 16
+# Bump when format_message_to_html changes, so cached fragments are re-rendered
+RENDER_VERSION = 2
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'report_cache.db')
+# Cached fragments of messages older than this are dropped
+FRAGMENT_TTL = timedelta(days=30)
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fragments (
+    channel TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    html TEXT NOT NULL,
+    PRIMARY KEY (channel, id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS reports (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+"""
+
+PLATFORM_ICONS = {
+    't.me': {
+        'name': 'Telegram',
+        'icon': '../assets/telegram.png'
+    },
+    'twitter.com': {
+        'name': 'X',
+        'icon': '../assets/x.png'
+    },
+    'x.com': {
+        'name': 'X',
+        'icon': '../assets/x.png'
+    }
+}
+
+def convert_to_local(utc_time, fmt='%Y-%m-%d %H:%M:%S'):
+    """Convert a UTC datetime to local time (GMT-3)"""
+    local_time = utc_time.astimezone(LOCAL_TZ)
+    return local_time.strftime(fmt) if fmt else local_time
+
+def get_platform_info(url):
+    """Return platform name and icon HTML for a given URL"""
+    if not url:
+        return None, ''
+
+    for domain, info in PLATFORM_ICONS.items():
+        if domain in url.lower():
+            return info['name'], f'<img class="platform-icon {info["name"].lower()}" src="{info["icon"]}" alt="{info["name"]} icon">'
+
+    return None, ''
+
+def extract_username_from_url(url):
+    """Extract username from Telegram or X/Twitter URL"""
+    if 't.me/' in url:
+        return url.split('t.me/')[1].split('/')[0]
+    elif 'twitter.com/' in url or 'x.com/' in url:
+        parts = url.split('/')
+        # Find the first part after domain that isn't 'status' and isn't empty
+        username = None
+        for part in parts:
+            if part and part not in ['twitter.com', 'x.com', 'status', 'https:', '']:
+                username = part
+                break
+        return username
+    return None
+
+def format_message_to_html(msg):
+    """Convert a Discord message to an HTML fragment.
+
+    Pieces are collected in a list and joined once, so a message costs one
+    string allocation instead of one per `+=`.
+    """
+    timestamp = convert_to_local(msg.datetime)
+
+    # Start message div
+    html = ['<div class="message">']
+
+    # Extract source and thumbnail from embeds
+    source = None
+    thumbnail_url = None
+    author_icon = None
+    for embed in msg.embeds:
+        if embed.get('thumbnail'):
+            thumbnail_url = (
+                embed['thumbnail'].get('proxy_url') or
+                embed['thumbnail'].get('url')
+            )
+
+        if embed.get('author') and embed['author'].get('icon_url'):
+            author_icon = (
+                embed['author'].get('proxy_icon_url') or
+                embed['author'].get('icon_url')
+            )
+
+        for field in embed.get('fields', []):
+            if field.get('name', '').lower() == 'source':
+                source = field.get('value', '')
+                break
+
+    if not source and msg.content:
+        source = msg.content
+
+    # Header section
+    html.append('<div class="header">')
+
+    if source and 'http' in source.lower():
+        url_start = source.find('http')
+        url_end = len(source)
+        for char in [' ', '\n', ')']:
+            pos = source.find(char, url_start)
+            if pos != -1:
+                url_end = min(url_end, pos)
+        url = source[url_start:url_end]
+        username = extract_username_from_url(url)
+        platform_name, platform_icon = get_platform_info(url)
+
+        # Source profile section, with the platform icon over the picture
+        html.append('<div class="source-profile">')
+        html.append('<div class="profile-picture-container">')
+        if 'twitter.com' in url.lower() or 'x.com' in url.lower():
+            if author_icon:
+                html.append(f'<img class="profile-picture" src="{author_icon}" alt="Profile" loading="lazy" onerror="this.style.display=\'none\'">')
+        elif thumbnail_url:
+            html.append(f'<img class="profile-picture" src="{thumbnail_url}" alt="Profile" loading="lazy" onerror="this.style.display=\'none\'">')
+        if platform_icon:
+            html.append(f'<div class="platform-icon-overlay">{platform_icon}</div>')
+        html.append('</div>')
+
+        # Username and handle
+        if username:
+            html.append(f'<div class="profile-info"><span class="username">@{username}</span></div>')
+
+        html.append('</div>')  # Close source-profile
+
+        # Link and timestamp
+        html.append('<div class="message-meta">')
+        html.append(f'<a href="{url}" target="_blank" class="source-link">{url}</a>')
+        html.append(f'<div class="timestamp">{timestamp} (GMT-3)</div>')
+        html.append('</div>')
+
+    html.append('</div>')  # Close header
+
+    # Message content section
+    if msg.embeds:
+        html.append('<div class="content">')
+        for embed in msg.embeds:
+            if embed.get('title'):
+                html.append(f'<div class="embed-title">{embed["title"]}</div>')
+
+            if embed.get('description'):
+                html.append(f'<div class="embed-description">{embed["description"]}</div>')
+
+            if embed.get('fields'):
+                html.append('<div class="embed-fields">')
+                for field in embed['fields']:
+                    if field.get('name', '').lower() != 'source' and field.get('value'):
+                        html.append(f'<div class="field"><div class="field-name">{field.get("name", "")}</div>')
+                        html.append(f'<div class="field-value">{field.get("value", "")}</div></div>')
+                html.append('</div>')
+        html.append('</div>')  # Close content div
+
+    # Attachments section
+    if msg.attachments:
+        html.append('<div class="attachments-grid">')
+        for attachment in msg.attachments:
+            content_type = attachment.get('content_type', '')
+            if content_type.startswith('image/'):
+                html.append(f'''
+                    <div class="attachment-item">
+                        <img src="{attachment["url"]}" 
+                             alt="{attachment["filename"]}" 
+                             class="attachment-img"
+                             loading="lazy">
+                    </div>''')
+            elif content_type.startswith('video/'):
+                html.append(f'''
+                    <div class="attachment-item">
+                        <video controls class="attachment-video">
+                            <source src="{attachment["url"]}" type="{content_type}">
+                            Your browser does not support the video tag.
+                        </video>
+                    </div>''')
+        html.append('</div>')
+
+    html.append('</div>')  # Close message div
+    return ''.join(html)
+
+class ReportTemplate:
+    """A report template split once around its {messages} placeholder.
+
+    The head and tail are small and formatted with the report's header
+    fields; the messages between them are never part of a format call, so
+    they can be written one fragment at a time.
+    """
+
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        self.fingerprint = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self.head, marker, self.tail = source.partition('{messages}')
+        if not marker:
+            raise ValueError(f"{path} has no {{messages}} placeholder")
+
+    def render_to(self, f, fragments, **fields):
+        """Write a report made of message fragments (oldest first) to an open text file"""
+        f.write(self.head.format(**fields))
+        for index, fragment in enumerate(fragments):
+            if index:
+                f.write('\n')
+            f.write(fragment)
+        f.write(self.tail.format(**fields))
+
+def message_hash(msg):
+    """Hash of everything a message's fragment is rendered from; changes when it is edited"""
+    # Compared by name: a message pickled to a render worker comes back
+    # with a copy of its projection, not the module's instance
+    if msg.projection.name != REPORT.name:
+        # Hashed as the report projection sees it, so a message kept whole
+        # (e.g. for a JSON dump as well) maps to the same cached fragment
+        msg = Message.from_discord(msg.to_dict(), REPORT)
+    content_hash = hashlib.blake2b(str(RENDER_VERSION).encode('ascii'), digest_size=16)
+    # The message's encoded JSON, shared with exports and SSE frames
+    content_hash.update(msg.to_json())
+    return content_hash.hexdigest()
+
+class FragmentCache:
+    """Rendered message fragments and report digests kept between runs.
+
+    A fragment is reused while its message's content hash is unchanged, so
+    only new or edited messages are rendered again. Each report's digest
+    covers the template, its header fields (but not the generation time)
+    and every message hash, which tells whether rewriting it would change
+    anything. Fragments of messages older than FRAGMENT_TTL are dropped.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("REPORT_CACHE_PATH", DEFAULT_CACHE_PATH)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Reports rendered in parallel processes share the file
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(CACHE_SCHEMA)
+        cutoff = datetime_to_snowflake(datetime.now(timezone.utc) - FRAGMENT_TTL)
+        with self._conn:
+            self._conn.execute("DELETE FROM fragments WHERE id < ?", (cutoff,))
+
+    def close(self):
+        self._conn.close()
+
+    def digest(self, path):
+        row = self._conn.execute(
+            "SELECT digest FROM reports WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_digest(self, path, digest):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports (path, digest) VALUES (?, ?)", (os.path.abspath(path), digest)
+            )
+
+    def fragments(self, channel, messages, hashes):
+        """HTML of each message (oldest first), rendering only missing or stale ones.
+
+        The cached fragments of the whole range are read in one ordered scan
+        alongside the messages. New fragments are committed by the next
+        set_digest.
+        """
+        if not messages:
+            return
+        rows = self._conn.execute(
+            "SELECT id, hash, html FROM fragments WHERE channel = ? AND id BETWEEN ? AND ? ORDER BY id",
+            (channel, messages[0].id, messages[-1].id),
+        )
+        row = next(rows, None)
+        rendered = []
+        for msg, content_hash in zip(messages, hashes):
+            while row is not None and row[0] < msg.id:
+                row = next(rows, None)
+            if row is not None and row[0] == msg.id and row[1] == content_hash:
+                yield row[2]
+            else:
+                html = format_message_to_html(msg)
+                rendered.append((channel, msg.id, content_hash, html))
+                yield html
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO fragments (channel, id, hash, html) VALUES (?, ?, ?, ?)", rendered
+        )
+
+_fragment_cache = None
+
+def get_fragment_cache():
+    """Return the process-wide fragment cache, opening it on first use"""
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache()
+    return _fragment_cache
+
+_templates = {}
+
+def get_template(name='report_template.html'):
+    """Return a parsed template from the assets directory, reading it once per process"""
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = ReportTemplate(os.path.join(TEMPLATE_DIR, name))
+    return template
+
+def report_path(channel_name, messages, directory='summaries'):
+    """summaries/report_<channel>_<start>_to_<end>.html for messages newest first"""
+    start_time = convert_to_local(messages[-1].datetime, '%Y-%m-%d_%H-%M-%S')
+    end_time = convert_to_local(messages[0].datetime, '%Y-%m-%d_%H-%M-%S')
+    return os.path.join(directory, f"report_{channel_name}_{start_time}_to_{end_time}.html")
+
+def write_html_report(path, channel_name, messages, cache=None):
+    """Stream the HTML report for messages (newest first) to path.
+
+    Nothing is written if the file already holds this exact report, and only
+    new or edited messages are rendered; the rest come from the fragment
+    cache. The file is written to a temporary name and moved into place, so
+    a reader never sees a half-written report. Returns whether it was written.
+    """
+    cache = cache or get_fragment_cache()
+    template = get_template()
+
+    start_time = convert_to_local(messages[-1].datetime)
+    end_time = convert_to_local(messages[0].datetime)
+    fields = {
+        'channel': channel_name,
+        'message_count': len(messages),
+        'time_range': f'{start_time} to {end_time} (GMT-3)',
+    }
+    hashes = [message_hash(msg) for msg in messages]
+
+    digest = hashlib.sha256()
+    digest.update(template.fingerprint.encode('utf-8'))
+    digest.update(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    for content_hash in hashes:
+        digest.update(content_hash.encode('ascii'))
+    digest = digest.hexdigest()
+    if os.path.exists(path) and cache.digest(path) == digest:
+        return False
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fields['timestamp'] = datetime.now(LOCAL_TZ).strftime('%Y-%m-%d %H:%M:%S')
+    fragments = cache.fragments(channel_name, messages[::-1], hashes[::-1])
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+        template.render_to(f, fragments, **fields)
+    os.replace(temp_path, path)
+    # Commits the newly rendered fragments along with the digest
+    cache.set_digest(path, digest)
+    return True
+
+def _write_report_job(job):
+    return job[0], write_html_report(*job)
+
+def write_html_reports(jobs, workers=None):
+    """Render several reports at once, one process per report.
+
+    jobs are (path, channel name, messages newest first) tuples; rendering is
+    CPU-bound, so processes rather than threads, one per core by default.
+    With a single job or core they are rendered in this process. Returns
+    (path, written) for each job; unchanged reports are not rewritten.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [_write_report_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_write_report_job, jobs))
@@ -1,10 +1,19 @@
-import requests
-import json
+import argparse
 import os
 import sys
 from dotenv import load_dotenv
 from colorama import Fore, Style
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone
+
+# Share the pager, message store and snowflake helpers with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from scraping.author_filter import feed_filter
+from scraping.channel_directory import get_directory
+from scraping.discord_client import iter_window_pages
+from scraping.models import Message
+from scraping.snowflake import snowflake_to_datetime, window_to_snowflake_range
+from storage.archive import MessageArchive
+from storage.json_export import COMPRESSIONS, FORMATS, JsonExportWriter, export_path
 
 # Load environment variables
 load_dotenv()
@@ -14,97 +23,8 @@ GUILD_ID = os.getenv("GUILD_ID")
 if not DISCORD_TOKEN:
     raise ValueError("Discord token not found. Please set DISCORD_TOKEN in environment variables.")
 
-def find_matching_channel(channels, search_term):
-    """Find channel that best matches the search term"""
-    search_term = search_term.lower()
-    
-    for channel in channels:
-        channel_name = channel['name'].lower()
-        if search_term in channel_name:
-            return channel
-    return None
-
-def get_guild_channels(guild_id):
-    headers = {
-        'Authorization': DISCORD_TOKEN
-    }
-    
-    try:
-        print(Fore.YELLOW + "Retrieving channels from server..." + Style.RESET_ALL)
-        url = f'https://discord.com/api/v10/guilds/{guild_id}/channels'
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            print(Fore.RED + f"Failed to retrieve channels: {response.status_code}" + Style.RESET_ALL)
-            return None
-        
-        channels = json.loads(response.text)
-        return channels
-            
-    except requests.exceptions.RequestException as e:
-        print(Fore.RED + f"Error retrieving channels: {e}" + Style.RESET_ALL)
-        return None
-
-def get_bot_messages(channel_id, bot_id="7032", hours=24):
-    headers = {
-        'Authorization': DISCORD_TOKEN
-    }
-    
-    try:
-        print(Fore.YELLOW + "Retrieving messages from channel..." + Style.RESET_ALL)
-        
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-        print(Fore.CYAN + f"Looking for messages after: {cutoff_time} UTC" + Style.RESET_ALL)
-        
-        bot_messages = []
-        last_message_id = None
-        MAX_MESSAGES = 1000  # Safety limit
-        
-        while True:
-            url = f'https://discord.com/api/v10/channels/{channel_id}/messages?limit=100'
-            if last_message_id:
-                url += f'&before={last_message_id}'
-            
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                print(Fore.RED + f"Failed to retrieve messages: {response.status_code}" + Style.RESET_ALL)
-                print(Fore.RED + f"Response: {response.text}" + Style.RESET_ALL)
-                break
-            
-            batch = json.loads(response.text)
-            
-            if not batch:
-                break
-            
-            for msg in batch:
-                username = msg['author'].get('username')
-                discriminator = msg['author'].get('discriminator')
-                msg_time = datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-                
-                if username == 'FaytuksBot' and discriminator == bot_id and msg_time >= cutoff_time:
-                    bot_messages.append(msg)
-                    print(Fore.CYAN + f"Found message from {msg_time} UTC by {username}#{discriminator}" + Style.RESET_ALL)
-            
-            if len(bot_messages) >= MAX_MESSAGES:
-                print(Fore.YELLOW + f"Reached maximum message limit ({MAX_MESSAGES}), stopping..." + Style.RESET_ALL)
-                break
-            
-            if len(batch) < 100:
-                break
-            
-            if datetime.fromisoformat(batch[-1]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc) < cutoff_time:
-                break
-                
-            last_message_id = batch[-1]['id']
-        
-        print(Fore.GREEN + f"Total messages from last {hours}h: {len(bot_messages)}" + Style.RESET_ALL)
-        return bot_messages
-
-    except requests.exceptions.RequestException as e:
-        print(Fore.RED + f"Error retrieving messages: {e}" + Style.RESET_ALL)
-        return []
+# Messages collected before each write to the columnar archive
+ARCHIVE_BATCH = 10000
 
 def save_json(channel_name, messages):
     """Save messages to a JSON file"""
@@ -113,23 +33,85 @@ def save_json(channel_name, messages):
     # Convert timestamps to local time (GMT-3)
     local_tz = timezone(timedelta(hours=-3))
     
-    start_time = datetime.fromisoformat(messages[-1]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc).astimezone(local_tz)
-    end_time = datetime.fromisoformat(messages[0]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc).astimezone(local_tz)
+    start_time = messages[-1].datetime.astimezone(local_tz)
+    end_time = messages[0].datetime.astimezone(local_tz)
     
     filename = f"data/messages_{channel_name}_{start_time.strftime('%Y-%m-%d_%H-%M-%S')}_to_{end_time.strftime('%Y-%m-%d_%H-%M-%S')}.json"
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(messages, f, indent=2, ensure_ascii=False)
+    # One compact message per line, reusing each message's encoded JSON
+    with open(filename, 'wb') as f:
+        f.write(b'[\n' + b',\n'.join(msg.to_json() for msg in messages) + b'\n]\n')
     
     print(Fore.GREEN + f"JSON data saved to {filename}" + Style.RESET_ALL)
 
+def export_json(channel_name, channel_id, hours, fmt='json', compression=None, output=None, resume=False,
+                archive=None):
+    """Stream a channel's feed messages to a JSON/NDJSON file page by page, oldest first.
+
+    With an archive (MessageArchive), the messages are also added to it in
+    batches of ARCHIVE_BATCH, since each write rewrites a day's file.
+    """
+    after_id, _ = window_to_snowflake_range(hours)
+    if output is None:
+        local_tz = timezone(timedelta(hours=-3))
+        start_time = snowflake_to_datetime(after_id).astimezone(local_tz)
+        output = export_path(f"data/messages_{channel_name}_{start_time.strftime('%Y-%m-%d_%H-%M-%S')}", fmt, compression)
+    
+    to_archive = []
+    with JsonExportWriter(output, fmt, compression, resume=resume) as writer:
+        if writer.last_id:
+            print(Fore.YELLOW + f"Resuming after {writer.count} messages ({snowflake_to_datetime(writer.last_id)} UTC)" + Style.RESET_ALL)
+            after_id = max(after_id, writer.last_id)
+        
+        for batch in iter_window_pages(channel_id, after_id):
+            messages = [Message.from_discord(msg) for msg in feed_filter.filter(batch)]
+            writer.write_page(messages)
+            if archive is not None:
+                to_archive.extend(messages)
+                if len(to_archive) >= ARCHIVE_BATCH:
+                    archive.write_messages(channel_id, to_archive)
+                    to_archive = []
+            print(Fore.CYAN + f"Written {writer.count} messages so far" + Style.RESET_ALL)
+    
+    if archive is not None and to_archive:
+        archive.write_messages(channel_id, to_archive)
+    print(Fore.GREEN + f"{writer.count} messages saved to {output}" + Style.RESET_ALL)
+    return writer.count
+
 def main():
-    channels = get_guild_channels(GUILD_ID)
-    if not channels:
+    parser = argparse.ArgumentParser(description="Save a channel's feed messages to a JSON file as they are scraped")
+    parser.add_argument('channel', nargs='?', help="Channel name to search for (default: choose from a list)")
+    parser.add_argument('--hours', type=int, help="Time window to scrape (default: ask)")
+    parser.add_argument('--format', choices=FORMATS, default='json',
+                        help="JSON array or one message per line (default: json)")
+    parser.add_argument('--compress', choices=COMPRESSIONS, help="Compress the output file")
+    parser.add_argument('--output', help="Output file (default: data/messages_<channel>_<start>.<format>)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted export of --output from its last message")
+    parser.add_argument('--archive', action='store_true',
+                        help="Also add the messages to the columnar archive (needs pyarrow)")
+    args = parser.parse_args()
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+    
+    archive = None
+    if args.archive:
+        try:
+            archive = MessageArchive()
+        except RuntimeError as e:
+            print(Fore.RED + str(e) + Style.RESET_ALL)
+            return
+
+    # Channels are cached on disk between runs (see CHANNEL_CACHE_TTL)
+    directory = get_directory(GUILD_ID, persistent=True)
+    try:
+        directory.ensure_loaded_sync()
+    except RuntimeError:
         print(Fore.RED + "Failed to retrieve channels" + Style.RESET_ALL)
         return
 
     # Time range selection
+    hours = args.hours
     time_options = {
         1: ("Last hour", 1),
         2: ("Last 4 hours", 4),
@@ -137,34 +119,27 @@ def main():
         4: ("Last 24 hours", 24)
     }
     
-    print(Fore.YELLOW + "\nSelect time range:" + Style.RESET_ALL)
-    for idx, (label, _) in time_options.items():
-        print(f"{idx}. {label}")
-    
-    try:
-        time_choice = int(input("Enter your choice (1-4): "))
-        if time_choice not in time_options:
-            print(Fore.RED + "Invalid time selection" + Style.RESET_ALL)
+    if hours is None:
+        print(Fore.YELLOW + "\nSelect time range:" + Style.RESET_ALL)
+        for idx, (label, _) in time_options.items():
+            print(f"{idx}. {label}")
+        
+        try:
+            time_choice = int(input("Enter your choice (1-4): "))
+            if time_choice not in time_options:
+                print(Fore.RED + "Invalid time selection" + Style.RESET_ALL)
+                return
+            hours = time_options[time_choice][1]
+        except ValueError:
+            print(Fore.RED + "Invalid input" + Style.RESET_ALL)
             return
-        hours = time_options[time_choice][1]
-    except ValueError:
-        print(Fore.RED + "Invalid input" + Style.RESET_ALL)
-        return
 
     # Use command line argument if provided, otherwise show channel selection
-    if len(sys.argv) == 2:
-        search_term = sys.argv[1]
-        channel = find_matching_channel(channels, search_term)
+    if args.channel:
+        search_term = args.channel
+        channel = directory.find(search_term)
     else:
-        # Filter channels with specific emojis
-        allowed_emojis = {'🟡', '🔴', '🟠', '⚫'}
-        filtered_channels = [
-            channel for channel in channels 
-            if channel['type'] == 0 and 
-            len(channel['name']) > 0 and
-            channel['name'][0] in allowed_emojis and
-            ('godly-chat' not in channel['name'] and channel.get('position', 0) < 40)
-        ]
+        filtered_channels = directory.script_allowed
 
         if not filtered_channels:
             print(Fore.RED + "No channels available for selection" + Style.RESET_ALL)
@@ -190,12 +165,10 @@ def main():
     
     print(Fore.GREEN + f"Found channel: {channel['name']}" + Style.RESET_ALL)
     
-    messages = get_bot_messages(channel['id'], hours=hours)
-    if not messages:
+    count = export_json(channel['name'], channel['id'], hours, args.format, args.compress, args.output, args.resume,
+                        archive)
+    if not count:
         print(Fore.RED + "No messages found in channel" + Style.RESET_ALL)
-        return
-    
-    save_json(channel['name'], messages)
 
 if __name__ == "__main__":
     main()
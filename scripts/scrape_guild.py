@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+from colorama import Fore, Style
+
+# Share the guild scraper and message store with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from scraping.async_client import close_client
+from scraping.author_filter import feed_filter
+from scraping.guild_scraper import DEFAULT_CONCURRENCY, scrape_guild
+from scrape_and_save_json import save_json
+from report_renderer import report_path, write_html_reports
+
+load_dotenv()
+GUILD_ID = os.getenv("GUILD_ID")
+
+async def scrape_all(hours, concurrency):
+    """Scrape every listed channel at once, returning {(channel name, feed): messages}"""
+    results = {}
+    try:
+        async for event in scrape_guild(GUILD_ID, hours, concurrency=concurrency):
+            name = event['name']
+            if event['status'] == 'started':
+                for feed in feed_filter.names:
+                    results[(name, feed)] = []
+                print(Fore.YELLOW + f"[{name}] started" + Style.RESET_ALL)
+            elif event['status'] == 'page':
+                results[(name, event['feed'])].extend(event['messages'])
+                print(Fore.CYAN + f"[{name}] {event['count']} messages" + Style.RESET_ALL)
+            elif event['status'] == 'done':
+                print(Fore.GREEN + f"[{name}] done: {event['count']} messages" + Style.RESET_ALL)
+            else:
+                print(Fore.RED + f"[{name}] failed: {event.get('error')}" + Style.RESET_ALL)
+    finally:
+        await close_client()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape every listed channel of the guild in parallel")
+    parser.add_argument('--hours', type=int, default=24, help="Time window to scrape (default: 24)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Channels scraped at the same time (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--html', action='store_true',
+                        help="Also write an HTML report per channel, rendered in parallel")
+    args = parser.parse_args()
+
+    results = asyncio.run(scrape_all(args.hours, args.concurrency))
+
+    reports = []
+    for (channel_name, feed), messages in results.items():
+        # With several feeds, each one gets its own file per channel
+        if len(feed_filter.names) > 1:
+            channel_name = f"{channel_name}_{feed}"
+        if not messages:
+            print(Fore.YELLOW + f"No messages found in {channel_name}" + Style.RESET_ALL)
+            continue
+        # Pages arrive oldest first; save_json expects newest first
+        messages.reverse()
+        save_json(channel_name, messages)
+        if args.html:
+            reports.append((report_path(channel_name, messages), channel_name, messages))
+
+    for filename, written in write_html_reports(reports):
+        if written:
+            print(Fore.GREEN + f"Report saved to {filename}" + Style.RESET_ALL)
+        else:
+            print(Fore.CYAN + f"Report {filename} is up to date" + Style.RESET_ALL)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 import requests
-import json
 import os
 import sys
 from dotenv import load_dotenv
 from colorama import Fore, Style
-from datetime import datetime, timedelta, timezone
-import anthropic
-import emoji
+from collections import deque
+import asyncio
 import time
 
+# Share the pager, message store, snowflake helpers and summarizer with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from scraping.author_filter import feed_filter
+from scraping.channel_directory import get_directory
+from scraping.discord_client import iter_window_pages
+from scraping.models import Message
+from scraping.projection import SUMMARY
+from scraping.snowflake import snowflake_to_datetime, window_to_snowflake_range
+from ai.summarizer import map_reduce_summary
+
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")
@@ -19,122 +27,46 @@ if not DISCORD_TOKEN:
 if not ANTHROPIC_API_KEY:
     raise ValueError("Anthropic API key not found. Please set ANTHROPIC_API_KEY in environment variables.")
 
-def find_matching_channel(channels, search_term):
-    """Find channel that best matches the search term"""
-    search_term = search_term.lower()
-    
-    for channel in channels:
-        channel_name = channel['name'].lower()
-        if search_term in channel_name:
-            return channel
-    return None
-
-def get_guild_channels(guild_id):
-    headers = {
-        'Authorization': DISCORD_TOKEN
-    }
-    
-    try:
-        print(Fore.YELLOW + "Retrieving channels from server..." + Style.RESET_ALL)
-        url = f'https://discord.com/api/v10/guilds/{guild_id}/channels'
-        
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            print(Fore.RED + f"Failed to retrieve channels: {response.status_code}" + Style.RESET_ALL)
-            return None
-        
-        channels = json.loads(response.text)
-        
-        return channels
-            
-    except requests.exceptions.RequestException as e:
-        print(Fore.RED + f"Error retrieving channels: {e}" + Style.RESET_ALL)
-        return None
-
-def get_bot_messages(channel_id, bot_id="7032"):
-    headers = {
-        'Authorization': DISCORD_TOKEN
-    }
-    
+def get_bot_messages(channel_id):
     try:
         print(Fore.YELLOW + "Retrieving messages from channel..." + Style.RESET_ALL)
         
         # Get 24 hours ago instead of midnight
-        cutoff_time = datetime.now(timezone.utc) - timedelta(days=1)
-        print(Fore.CYAN + f"Looking for messages after: {cutoff_time} UTC" + Style.RESET_ALL)
+        after_id, _ = window_to_snowflake_range(24)
+        print(Fore.CYAN + f"Looking for messages after: {snowflake_to_datetime(after_id)} UTC" + Style.RESET_ALL)
         
-        all_messages = []
-        last_message_id = None
-        MAX_MESSAGES = 1000  # Safety limit
+        # Safety limit on bot messages; pages arrive oldest first, so the
+        # newest are kept
+        MAX_MESSAGES = 1000
+        bot_messages = deque(maxlen=MAX_MESSAGES)
+        total_messages = 0
+        total_bot_messages = 0
         
-        while True:
-            url = f'https://discord.com/api/v10/channels/{channel_id}/messages?limit=100'
-            if last_message_id:
-                url += f'&before={last_message_id}'
-            
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                print(Fore.RED + f"Failed to retrieve messages: {response.status_code}" + Style.RESET_ALL)
-                print(Fore.RED + f"Response: {response.text}" + Style.RESET_ALL)
-                break
-            
-            batch = json.loads(response.text)
-            
-            if not batch:
-                print(Fore.YELLOW + "No more messages in batch" + Style.RESET_ALL)
-                break
-            
+        for batch in iter_window_pages(channel_id, after_id):
             # Debug first and last message in batch
-            first_msg_time = datetime.fromisoformat(batch[0]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-            last_msg_time = datetime.fromisoformat(batch[-1]['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-            print(Fore.CYAN + f"Batch time range: {first_msg_time} to {last_msg_time} UTC" + Style.RESET_ALL)
+            print(Fore.CYAN + f"Batch time range: {snowflake_to_datetime(batch[0]['id'])} to {snowflake_to_datetime(batch[-1]['id'])} UTC" + Style.RESET_ALL)
             
-            # Filter messages from last 24 hours
-            recent_messages = []
+            total_messages += len(batch)
+            print(Fore.CYAN + f"Retrieved batch of {len(batch)} messages from last 24h. Total so far: {total_messages}" + Style.RESET_ALL)
+            
+            # Filter for bot messages with more detailed debugging
             for msg in batch:
-                msg_time = datetime.fromisoformat(msg['timestamp'].rstrip('Z')).replace(tzinfo=timezone.utc)
-                if msg_time >= cutoff_time:
-                    recent_messages.append(msg)
-                    # Debug message info
-                    print(Fore.CYAN + f"Found message from {msg_time} by {msg['author'].get('username')}#{msg['author'].get('discriminator', 'N/A')}" + Style.RESET_ALL)
+                username = msg['author'].get('username')
+                discriminator = msg['author'].get('discriminator')
+                if feed_filter.matches(msg):
+                    bot_messages.append(Message.from_discord(msg, SUMMARY))
+                    total_bot_messages += 1
+                    print(Fore.GREEN + f"Found bot message from {username}#{discriminator}" + Style.RESET_ALL)
                 else:
-                    print(Fore.YELLOW + f"Message from {msg_time} is older than 24 hours, stopping..." + Style.RESET_ALL)
-                    break
-            
-            all_messages.extend(recent_messages)
-            
-            # Stop if we've hit the message limit
-            if len(all_messages) >= MAX_MESSAGES:
-                print(Fore.YELLOW + f"Reached maximum message limit ({MAX_MESSAGES}), stopping..." + Style.RESET_ALL)
-                break
-            
-            # If we found any messages older than cutoff, stop fetching
-            if len(recent_messages) < len(batch):
-                break
-            
-            # If no more messages in batch, stop
-            if len(batch) < 100:
-                print(Fore.YELLOW + "Incomplete batch, stopping..." + Style.RESET_ALL)
-                break
-                
-            print(Fore.CYAN + f"Retrieved batch of {len(recent_messages)} messages from last 24h. Total so far: {len(all_messages)}" + Style.RESET_ALL)
-            
-            last_message_id = batch[-1]['id']
+                    print(Fore.YELLOW + f"Skipping message from {username}#{discriminator}" + Style.RESET_ALL)
         
-        # Filter for bot messages with more detailed debugging
-        bot_messages = []
-        for msg in all_messages:
-            username = msg['author'].get('username')
-            discriminator = msg['author'].get('discriminator')
-            if username == 'FaytuksBot' and discriminator == bot_id:
-                bot_messages.append(msg)
-                print(Fore.GREEN + f"Found bot message from {username}#{discriminator}" + Style.RESET_ALL)
-            else:
-                print(Fore.YELLOW + f"Skipping message from {username}#{discriminator}" + Style.RESET_ALL)
+        if total_bot_messages > MAX_MESSAGES:
+            print(Fore.YELLOW + f"Reached maximum message limit ({MAX_MESSAGES}), keeping the newest" + Style.RESET_ALL)
         
-        print(Fore.GREEN + f"Total messages from today: {len(all_messages)}" + Style.RESET_ALL)
+        # save_output expects newest first
+        bot_messages = list(reversed(bot_messages))
+        
+        print(Fore.GREEN + f"Total messages from today: {total_messages}" + Style.RESET_ALL)
         print(Fore.GREEN + f"Bot messages from today: {len(bot_messages)}" + Style.RESET_ALL)
         
         if not bot_messages:
@@ -147,13 +79,8 @@ def get_bot_messages(channel_id, bot_id="7032"):
         return []
 
 def get_channel_summary(channel_name, messages):
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    
     print(Fore.YELLOW + "Analyzing messages with Claude..." + Style.RESET_ALL)
     
-    BATCH_SIZE = 50
-    message_batches = [messages[i:i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)]
-    
     system_prompt = """
     You are an experienced news analyst tasked with summarizing a sequence of events from a series of messages. Your goal is to create a clear, concise, and objective summary that highlights the most critical events without repetition or unnecessary details.
 
@@ -176,28 +103,23 @@ def get_channel_summary(channel_name, messages):
     - Maintain a neutral, factual, emotionless tone suitable for a broad audience.
     """
 
-    all_content = []
-    for batch_num, batch in enumerate(message_batches, 1):
-        print(Fore.CYAN + f"Processing batch {batch_num}/{len(message_batches)}..." + Style.RESET_ALL)
-        
-        batch_content = f"Messages from '{channel_name}':\n{'-' * 40}\n"
-        for msg in batch:
-            timestamp = datetime.fromisoformat(msg['timestamp'].rstrip('Z')).strftime('%Y-%m-%d %H:%M:%S')
-            batch_content += f"Date: {timestamp}\nContent: {msg['embeds']}\n"
-        all_content.append(batch_content)
+    message_texts = []
+    for msg in messages:
+        timestamp = msg.datetime.strftime('%Y-%m-%d %H:%M:%S')
+        message_texts.append(f"Date: {timestamp}\nContent: {msg.embeds}\n")
     
-    # Single API call with all content
+    def reduce_prompt(content):
+        return f"Analyze and summarize these messages:\n\nMessages from '{channel_name}':\n{'-' * 40}\n{content}"
+    
+    # Large windows are split by token budget and summarized chunk by chunk
     try:
-        response = client.messages.create(
+        return asyncio.run(map_reduce_summary(
+            message_texts,
+            reduce_prompt,
+            system=system_prompt,
             model="claude-3-haiku-20240307",
             max_tokens=1024,
-            system=system_prompt,
-            messages=[{
-                "role": "user",
-                "content": f"Analyze and summarize these messages:\n\n{'-' * 40}\n".join(all_content)
-            }]
-        )
-        return response.content[0].text
+        ))
         
     except Exception as e:
         print(Fore.RED + f"Error processing messages: {e}" + Style.RESET_ALL)
@@ -206,8 +128,8 @@ def get_channel_summary(channel_name, messages):
 def save_output(channel_name, messages, summary):
     os.makedirs('summaries', exist_ok=True)
     
-    start_time = datetime.fromisoformat(messages[-1]['timestamp'].rstrip('Z')).strftime('%Y-%m-%d_%H-%M-%S')
-    end_time = datetime.fromisoformat(messages[0]['timestamp'].rstrip('Z')).strftime('%Y-%m-%d_%H-%M-%S')
+    start_time = messages[-1].datetime.strftime('%Y-%m-%d_%H-%M-%S')
+    end_time = messages[0].datetime.strftime('%Y-%m-%d_%H-%M-%S')
     
     summary_filename = f"summaries/summary_{channel_name}_{start_time}_to_{end_time}.txt"
     with open(summary_filename, 'w', encoding='utf-8') as f:
@@ -216,23 +138,20 @@ def save_output(channel_name, messages, summary):
     print(Fore.GREEN + f"Summary saved to {summary_filename}" + Style.RESET_ALL)
 
 def main():
-    channels = get_guild_channels(GUILD_ID)
-    if not channels:
+    # Channels are cached on disk between runs (see CHANNEL_CACHE_TTL)
+    directory = get_directory(GUILD_ID, persistent=True)
+    try:
+        directory.ensure_loaded_sync()
+    except RuntimeError:
         print(Fore.RED + "Failed to retrieve channels" + Style.RESET_ALL)
         return
+    channels = directory.channels
 
     # Handle channel selection
     if len(sys.argv) == 2:
         search_term = sys.argv[1]
     else:
-        allowed_emojis = {'🟡', '🔴', '🟠', '⚫'}
-        filtered_channels = [
-            channel for channel in channels 
-            if channel['type'] == 0 and  # 0 is the type for text channels
-            len(emoji.emoji_list(channel['name'])) == 1 and # Only one emoji at the start
-            channel['name'][0] in allowed_emojis and
-            ('godly-chat' not in channel['name'] and channel.get('position', 0) < 40)
-        ]
+        filtered_channels = directory.script_allowed
 
         if not filtered_channels:
             print(Fore.RED + "No channels available for selection" + Style.RESET_ALL)
@@ -254,7 +173,7 @@ def main():
 
         search_term = channel['name']
 
-    channel = find_matching_channel(channels, search_term)
+    channel = directory.find(search_term)
     if not channel:
         print(Fore.RED + f"No channel found matching '{search_term}'" + Style.RESET_ALL)
         print(Fore.YELLOW + "Available channels:" + Style.RESET_ALL)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The backend runs from backend/ with absolute imports; the fake Discord
+# server lives with the benchmarks
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
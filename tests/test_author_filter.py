@@ -0,0 +1,36 @@
+import pytest
+
+from scraping.author_filter import AuthorFilter, parse_feeds
+
+def message(author_id, username='someone', discriminator='0'):
+    return {'author': {'id': author_id, 'username': username, 'discriminator': discriminator}}
+
+def test_parse_feeds_groups_repeated_names():
+    assert parse_feeds(" a=1, b=Bot#7032 ,a=2,") == {'a': ['1', '2'], 'b': ['Bot#7032']}
+
+def test_parse_feeds_rejects_entries_without_an_author():
+    with pytest.raises(ValueError):
+        parse_feeds("a=1,b")
+
+def test_matches_by_id_and_legacy_tag():
+    feeds = AuthorFilter({'ids': ['111'], 'tags': ['FaytuksBot#7032', 'newname']})
+    assert feeds.subscriptions_for(message('111')) == ('ids',)
+    assert feeds.subscriptions_for(message('222', 'FaytuksBot', '7032')) == ('tags',)
+    # Migrated usernames have no discriminator
+    assert feeds.subscriptions_for(message('333', 'newname', '0')) == ('tags',)
+    assert feeds.subscriptions_for(message('444', 'FaytuksBot', '1234')) == ()
+
+def test_only_matching_authors_are_remembered():
+    feeds = AuthorFilter({'bot': ['FaytuksBot#7032']})
+    for author_id in range(1000):
+        feeds.matches(message(str(author_id)))
+    feeds.matches(message('5000', 'FaytuksBot', '7032'))
+    assert set(feeds._by_id) == {'5000'}
+    # Remembered by ID, so a later rename keeps matching
+    assert feeds.matches(message('5000', 'renamed', '0'))
+
+def test_split_puts_each_message_in_every_matching_feed():
+    feeds = AuthorFilter({'a': ['1'], 'b': ['1', '2']})
+    page = [message('1'), message('2'), message('3')]
+    assert feeds.split(page) == {'a': [page[0]], 'b': [page[0], page[1]]}
+    assert feeds.filter(page) == page[:2]
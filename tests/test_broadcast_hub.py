@@ -0,0 +1,74 @@
+import asyncio
+
+from scraping.broadcast_hub import Broadcast, BroadcastHub
+
+async def numbers(count, produced):
+    for n in range(count):
+        produced.append(n)
+        yield n
+        await asyncio.sleep(0)
+
+async def collect(items):
+    received = []
+    async for item in items:
+        received.append(item)
+    return received
+
+def test_subscribers_share_one_producer():
+    async def run():
+        produced = []
+        hub = BroadcastHub()
+        first = hub.open('key', lambda: numbers(20, produced))
+        second = hub.open('key', lambda: numbers(20, produced))
+        assert first is second
+        results = await asyncio.gather(
+            *(collect(first.subscribe()) for _ in range(2))
+        )
+        return produced, results
+
+    produced, results = asyncio.run(run())
+    assert produced == list(range(20))
+    assert results == [list(range(20))] * 2
+
+def test_producer_waits_for_the_slowest_subscriber():
+    async def run():
+        produced = []
+        broadcast = Broadcast(numbers(50, produced), lead=2)
+        leads = []
+        async def slow():
+            async for item in broadcast.subscribe():
+                await asyncio.sleep(0.001)
+                leads.append(len(produced) - item)
+        fast = asyncio.create_task(collect(broadcast.subscribe()))
+        await slow()
+        return leads, await fast
+
+    leads, fast = asyncio.run(run())
+    assert fast == list(range(50))
+    # The item being handled, the ones buffered and the one the source holds
+    assert max(leads) <= 4
+
+def test_producer_finishes_without_subscribers():
+    async def run():
+        produced = []
+        broadcast = Broadcast(numbers(50, produced), lead=2)
+        await broadcast._task
+        # A late subscriber replays everything
+        return produced, await collect(broadcast.subscribe())
+
+    produced, replay = asyncio.run(run())
+    assert produced == replay == list(range(50))
+
+def test_leaving_subscriber_releases_the_producer():
+    async def run():
+        produced = []
+        broadcast = Broadcast(numbers(50, produced), lead=2)
+        items = broadcast.subscribe()
+        await items.__anext__()
+        await items.aclose()
+        await asyncio.wait_for(broadcast._task, 1)
+        return produced, broadcast.subscribers
+
+    produced, subscribers = asyncio.run(run())
+    assert produced == list(range(50))
+    assert subscribers == 0
@@ -0,0 +1,36 @@
+import json
+
+from storage.dump_index import dump_channel, scan_dump
+
+MESSAGES = [
+    {'id': '1300000000000000001', 'content': 'first'},
+    {'id': '1300000000000000002', 'content': 'café – ünïcode'},
+    {'id': '1300000000000000003', 'content': 'with "quotes" and ] brackets'},
+]
+
+def spans(data):
+    return [(message_id, data[offset:offset + length]) for message_id, offset, length in scan_dump(data)]
+
+def test_indented_array():
+    data = json.dumps(MESSAGES, indent=2, ensure_ascii=False).encode('utf-8')
+    found = spans(data)
+    assert [message_id for message_id, _ in found] == [int(msg['id']) for msg in MESSAGES]
+    # Offsets are byte offsets, also after multi-byte characters
+    assert [json.loads(raw) for _, raw in found] == MESSAGES
+
+def test_compact_lines_and_ndjson():
+    array = b'[\n' + b',\n'.join(json.dumps(msg).encode('utf-8') for msg in MESSAGES) + b'\n]\n'
+    ndjson = b''.join(json.dumps(msg, ensure_ascii=False).encode('utf-8') + b'\n' for msg in MESSAGES)
+    for data in (array, ndjson):
+        assert [json.loads(raw) for _, raw in spans(data)] == MESSAGES
+
+def test_empty_and_partial_dumps():
+    assert spans(b'[]\n') == []
+    assert spans(b'') == []
+    data = json.dumps(MESSAGES).encode('utf-8')
+    # A dump still being written: the cut message is left out
+    assert [message_id for message_id, _ in spans(data[:-20])] == [int(msg['id']) for msg in MESSAGES[:2]]
+
+def test_dump_channel():
+    assert dump_channel('data/messages_🔴alerts_2026-10-18_09-00-00_to_2026-10-18_12-00-00.json') == '🔴alerts'
+    assert dump_channel('data/other.json') is None
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fake_discord import FakeDiscord
+from scraping.async_client import close_client
+from scraping.live_follower import ChannelFollower
+from scraping.snowflake import datetime_to_snowflake
+from storage.message_store import MessageStore
+
+def snowflake_ago(**delta):
+    return datetime_to_snowflake(datetime.now(timezone.utc) - timedelta(**delta))
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeDiscord(channels=1, hours=3, interval=60, latency=0)
+    monkeypatch.setenv('DISCORD_API_BASE', fake.start())
+    yield fake
+    fake.stop()
+
+@pytest.fixture
+def follower(fake, tmp_path):
+    store = MessageStore(str(tmp_path / 'messages.db'))
+    yield ChannelFollower(fake.channels[0]['id'], store)
+    store.close()
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_client()
+    return asyncio.run(main())
+
+def test_first_viewer_resumes_from_its_own_id(follower):
+    async def first_poll():
+        queue = follower.subscribe(snowflake_ago(minutes=30))
+        try:
+            return await asyncio.wait_for(queue.get(), 5)
+        finally:
+            follower.unsubscribe(queue)
+
+    messages = run(first_poll())
+    # One message a minute, two of every three from the feed bot
+    assert 19 <= len(messages) <= 21
+
+def test_late_viewer_rewinds_a_running_follower(follower):
+    async def polls():
+        first = follower.subscribe()
+        await asyncio.sleep(0.2)
+        second = follower.subscribe(snowflake_ago(minutes=30))
+        try:
+            return await asyncio.wait_for(second.get(), 5)
+        finally:
+            follower.unsubscribe(first)
+            follower.unsubscribe(second)
+
+    assert len(run(polls())) >= 19
+
+def test_resume_is_refused_beyond_the_backfill_window(follower):
+    assert follower.can_resume(snowflake_ago(minutes=30))
+    assert not follower.can_resume(snowflake_ago(hours=2))
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fake_discord import FakeDiscord
+from scraping import discord_client
+from scraping.snowflake import datetime_to_snowflake, window_to_snowflake_range
+from storage.message_store import MessageStore
+
+def snowflake_ago(**delta):
+    return datetime_to_snowflake(datetime.now(timezone.utc) - timedelta(**delta))
+
+@pytest.fixture
+def store(tmp_path):
+    store = MessageStore(str(tmp_path / 'messages.db'), revalidate_window=600)
+    yield store
+    store.close()
+
+def test_plan_sync_fetches_everything_when_nothing_is_synced(store):
+    after_id = snowflake_ago(hours=6)
+    assert store.plan_sync('1', after_id) == [('fetch', after_id, None)]
+
+def test_plan_sync_reads_settled_range_and_revalidates_the_tail(store):
+    low_id, high_id = snowflake_ago(hours=6), snowflake_ago(seconds=1)
+    store.mark_synced('1', low_id, high_id)
+
+    steps = store.plan_sync('1', low_id)
+    assert [step for step, _, _ in steps] == ['local', 'fetch']
+    (_, local_after, local_through), (_, fetch_after, fetch_before) = steps
+    assert local_after == low_id
+    assert fetch_after == local_through and fetch_before is None
+    # Only the revalidation window is downloaded again
+    assert abs(local_through - snowflake_ago(minutes=10)) < 5000 << 22
+
+def test_plan_sync_downloads_below_the_synced_range(store):
+    low_id = snowflake_ago(hours=6)
+    store.mark_synced('1', low_id, snowflake_ago(seconds=1))
+
+    after_id = snowflake_ago(hours=24)
+    steps = store.plan_sync('1', after_id)
+    assert [step for step, _, _ in steps] == ['fetch', 'local', 'fetch']
+    assert steps[0] == ('fetch', after_id, low_id + 1)
+    assert steps[1][1] == low_id
+
+def test_plan_sync_narrower_window_is_local(store):
+    store.mark_synced('1', snowflake_ago(hours=6), snowflake_ago(seconds=1))
+
+    after_id = snowflake_ago(hours=1)
+    steps = store.plan_sync('1', after_id)
+    assert [step for step, _, _ in steps] == ['local', 'fetch']
+    assert steps[0][1] == after_id
+
+def test_plan_sync_ignores_a_range_that_is_all_recent(store):
+    low_id = snowflake_ago(minutes=5)
+    store.mark_synced('1', low_id, snowflake_ago(seconds=1))
+
+    after_id = snowflake_ago(hours=1)
+    assert store.plan_sync('1', after_id) == [('fetch', after_id, None)]
+
+def test_mark_synced_extends_overlapping_ranges(store):
+    store.mark_synced('1', 100, 200)
+    store.mark_synced('1', 150, 300)
+    assert store.coverage('1') == (100, 300)
+    store.mark_synced('1', 50, 100)
+    assert store.coverage('1') == (50, 300)
+
+def test_mark_synced_replaces_a_disjoint_range(store):
+    store.mark_synced('1', 100, 200)
+    store.mark_synced('1', 300, 400)
+    assert store.coverage('1') == (300, 400)
+
+@pytest.fixture
+def fake(monkeypatch):
+    # One message every 20 seconds: 180 an hour, about two pages
+    fake = FakeDiscord(channels=1, hours=25, interval=20, latency=0)
+    monkeypatch.setattr(discord_client, 'DISCORD_API_BASE', fake.start())
+    yield fake
+    fake.stop()
+
+def scrape(fake, store, hours):
+    """Requests made and messages read by a scrape of the last `hours`"""
+    before = fake.request_count
+    after_id, _ = window_to_snowflake_range(hours)
+    channel_id = fake.channels[0]['id']
+    count = sum(len(page) for page in discord_client.iter_window_pages(channel_id, after_id, store))
+    return fake.request_count - before, count
+
+def test_repeat_scrape_takes_about_one_request(fake, store):
+    cold_requests, cold_count = scrape(fake, store, 6)
+    assert cold_requests >= 10
+
+    requests, count = scrape(fake, store, 6)
+    assert requests <= 2
+    assert count == cold_count
+
+def test_narrower_scrape_takes_about_one_request(fake, store):
+    scrape(fake, store, 6)
+    requests, count = scrape(fake, store, 1)
+    assert requests <= 2
+    assert count == 180
+
+def test_wider_scrape_downloads_only_the_older_part(fake, store):
+    scrape(fake, store, 6)
+    requests, count = scrape(fake, store, 24)
+    # 18 more hours at about 1.8 pages an hour, plus the revalidated tail
+    assert requests <= 36
+    assert count == 24 * 180
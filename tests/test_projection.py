@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from ai.summary_cache import summary_cache_key
+from fake_discord import make_message
+from scraping.models import Message
+from scraping.projection import FRONTEND, FULL, REPORT, SUMMARY, Projection
+from scraping.serialization import loads
+
+RAW = make_message('1', int(time.time() * 1000), 7)
+
+def test_unknown_fields_are_refused():
+    with pytest.raises(ValueError):
+        Projection('bad', fields=('content', 'reactions'))
+
+def test_full_keeps_every_field():
+    data = Message.from_discord(RAW).to_dict()
+    assert set(data) == {'id', 'timestamp', 'edited_timestamp', 'author', 'content', 'embeds', 'attachments'}
+    assert data['embeds'][0]['author']['name'] == RAW['embeds'][0]['author']['name']
+
+@pytest.mark.parametrize('projection', [FRONTEND, REPORT, SUMMARY], ids=lambda projection: projection.name)
+def test_projected_json_holds_only_its_fields(projection):
+    msg = Message.from_discord(RAW, projection)
+    data = loads(msg.to_json())
+    assert set(data) == {'id', *projection.fields}
+    for embed in data.get('embeds', []):
+        assert set(embed) <= {*projection.embed_keys, 'fields', 'thumbnail', 'author'}
+        assert set(embed.get('author', {})) <= set(projection.embed_author_keys)
+    for attachment in data.get('attachments', []):
+        assert set(attachment) <= set(projection.attachment_keys)
+
+def test_summary_drops_what_summaries_never_read():
+    data = Message.from_discord(RAW, SUMMARY).to_dict()
+    assert 'attachments' not in data and 'author' not in data
+    assert set(data['embeds'][0]) == {'title', 'description', 'fields'}
+
+def test_projected_message_round_trips_through_to_dict():
+    msg = Message.from_discord(RAW, FRONTEND)
+    again = Message.from_discord(msg.to_dict(), FRONTEND)
+    assert again.to_json() == msg.to_json()
+    # The creation time comes from the ID whatever the projection
+    assert Message.from_discord(RAW, REPORT).datetime == Message.from_discord(RAW, FULL).datetime
+
+@pytest.mark.parametrize('projection', [FULL, FRONTEND, SUMMARY], ids=lambda projection: projection.name)
+def test_summary_key_changes_on_edit(projection):
+    edited = dict(RAW, edited_timestamp='2026-10-18T12:00:00+00:00')
+    key = summary_cache_key([Message.from_discord(RAW, projection)], 'model', '1')
+    assert key != summary_cache_key([Message.from_discord(edited, projection)], 'model', '1')
+
+def test_summary_key_refuses_messages_without_edit_time():
+    no_edits = Projection('no-edits', fields=('content',))
+    with pytest.raises(ValueError):
+        summary_cache_key([Message.from_discord(RAW, no_edits)], 'model', '1')
@@ -0,0 +1,22 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from report_renderer import format_message_to_html
+from scraping.models import Message
+from scraping.projection import FULL, REPORT
+
+# Messages and the fragments the original string-concatenating renderer made of them
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'baseline_report_fragments.json'),
+          encoding='utf-8') as f:
+    BASELINE = json.load(f)
+
+@pytest.mark.parametrize('name', sorted(BASELINE['messages']))
+@pytest.mark.parametrize('projection', [FULL, REPORT], ids=lambda projection: projection.name)
+def test_fragment_matches_the_original_renderer(name, projection):
+    msg = Message.from_discord(BASELINE['messages'][name], projection)
+    assert format_message_to_html(msg) == BASELINE['fragments'][name]
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from fake_discord import make_message
+from storage.message_store import MessageStore
+from storage.search_index import fts_query
+
+def test_fts_query_quotes_every_term():
+    assert fts_query('missile strike') == '"missile" "strike"'
+
+def test_fts_query_keeps_phrases_and_prefixes():
+    assert fts_query('"air defense" launch*') == '"air defense" "launch"*'
+
+def test_fts_query_escapes_query_syntax():
+    assert fts_query('AND OR NOT (x) -y col:z') == '"AND" "OR" "NOT" "(x)" "-y" "col:z"'
+    assert fts_query('say"what') == '"say""what"'
+
+def test_fts_query_drops_empty_terms():
+    assert fts_query('  "" * ') == ''
+
+@pytest.fixture
+def store(tmp_path):
+    store = MessageStore(str(tmp_path / 'messages.db'))
+    yield store
+    store.close()
+
+def test_search_finds_content_and_embeds(store):
+    now_ms = int(time.time() * 1000)
+    messages = [make_message('1', now_ms - n * 1000, n) for n in range(6)]
+    store.save_messages('1', messages)
+
+    # Chat messages (every third) carry content, the bot's carry embeds
+    content_hits = store.search('"chat message 3"')
+    assert [msg['id'] for _, msg, _ in content_hits] == [messages[3]['id']]
+    embed_hits = store.search('update 4 officials')
+    assert [msg['id'] for _, msg, _ in embed_hits] == [messages[4]['id']]
+    assert '[' in embed_hits[0][2]
+
+def test_search_bounds_and_channel(store):
+    now_ms = int(time.time() * 1000)
+    messages = [make_message('1', now_ms - n * 1000, n) for n in range(1, 8, 3)]
+    store.save_messages('1', messages[:2])
+    store.save_messages('2', messages[2:])
+
+    ids = lambda hits: [int(msg['id']) for _, msg, _ in hits]
+    assert ids(store.search('officials')) == sorted(int(msg['id']) for msg in messages)[::-1]
+    assert ids(store.search('officials', channel_id='2')) == [int(messages[2]['id'])]
+    assert ids(store.search('officials', after_id=int(messages[1]['id']))) == [int(messages[0]['id'])]
+
+def test_pruned_messages_leave_the_index(store):
+    now_ms = int(time.time() * 1000)
+    messages = [make_message('1', now_ms - n * 1000, n) for n in (1, 2)]
+    store.save_messages('1', messages)
+    ids = sorted(int(msg['id']) for msg in messages)
+    assert store.prune_deleted('1', ids[0] - 1, ids[1], {ids[1]}) == 1
+    assert [int(msg['id']) for _, msg, _ in store.search('officials')] == [ids[1]]
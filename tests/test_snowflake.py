@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+from scraping.snowflake import (
+    DISCORD_EPOCH, datetime_to_snowflake, snowflake_to_datetime, snowflake_to_epoch_ms,
+    window_to_snowflake_range,
+)
+
+NOW = datetime(2026, 10, 18, 12, 0, 0, tzinfo=timezone.utc)
+
+def test_known_snowflake():
+    # Example from the Discord API reference
+    assert snowflake_to_epoch_ms('175928847299117063') == 1462015105796
+    assert snowflake_to_datetime(175928847299117063) == datetime(2016, 4, 30, 11, 18, 25, 796000, tzinfo=timezone.utc)
+
+def test_datetime_round_trip():
+    low = datetime_to_snowflake(NOW)
+    high = datetime_to_snowflake(NOW, high=True)
+    assert low < high
+    assert snowflake_to_datetime(low) == snowflake_to_datetime(high) == NOW
+    assert datetime_to_snowflake(NOW - timedelta(milliseconds=1), high=True) == low - 1
+
+def test_naive_datetimes_are_utc():
+    assert datetime_to_snowflake(NOW.replace(tzinfo=None)) == datetime_to_snowflake(NOW)
+
+def test_before_the_discord_epoch_is_zero():
+    assert datetime_to_snowflake(datetime(2010, 1, 1, tzinfo=timezone.utc)) == 0
+    assert snowflake_to_epoch_ms(0) == DISCORD_EPOCH
+
+def test_window_bounds_are_exclusive():
+    after_id, before_id = window_to_snowflake_range(6, now=NOW)
+    start = datetime_to_snowflake(NOW - timedelta(hours=6))
+    # Messages created at the first and last millisecond are inside
+    assert after_id < start
+    assert datetime_to_snowflake(NOW, high=True) < before_id
+    assert after_id == start - 1
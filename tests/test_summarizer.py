@@ -0,0 +1,37 @@
+import asyncio
+
+from ai import summarizer
+
+def fake_complete(calls, reply_tokens):
+    async def complete(prompt, system=None, model=None, max_tokens=None):
+        calls.append(prompt)
+        return 'x' * (reply_tokens * 4)
+    return complete
+
+def test_chunk_texts_keeps_order_within_budget():
+    texts = ['a' * 40, 'b' * 40, 'c' * 40]
+    assert summarizer.chunk_texts(texts, token_budget=25) == [texts[:2], texts[2:]]
+
+def test_condense_texts_returns_small_input_as_is(monkeypatch):
+    calls = []
+    monkeypatch.setattr(summarizer, 'complete', fake_complete(calls, 10))
+    assert asyncio.run(summarizer.condense_texts(['one', 'two'])) == 'one\n---\ntwo'
+    assert calls == []
+
+def test_condense_texts_reduces_until_the_partials_fit(monkeypatch):
+    calls = []
+    monkeypatch.setattr(summarizer, 'complete', fake_complete(calls, 100))
+    texts = ['x' * 4000] * 10
+    result = asyncio.run(summarizer.condense_texts(texts, token_budget=2100))
+    # Five chunks condensed to five 100-token partials, which fit one chunk
+    assert len(calls) == 5
+    assert result.count('\n---\n') == 4
+
+def test_condense_texts_stops_when_a_round_does_not_shrink(monkeypatch):
+    calls = []
+    # Every partial fills a chunk on its own, as with a budget at CHUNK_MAX_TOKENS
+    monkeypatch.setattr(summarizer, 'complete', fake_complete(calls, 1500))
+    texts = ['x' * 6000] * 4
+    result = asyncio.run(summarizer.condense_texts(texts, token_budget=1500))
+    assert len(calls) == 4
+    assert result.count('\n---\n') == 3